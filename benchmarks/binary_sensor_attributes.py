@@ -0,0 +1,159 @@
+"""Benchmark the cached state of the updated binary sensors.
+
+Updates many updated binary sensors for coordinator updates with unchanged
+and with changed values, once with the cached icon, state and attributes of
+ScrapeBinarySensor and once building them on every read like before the
+cache. Both the reads of the properties and complete state writes are
+timed, the best of several rounds is shown.
+
+Run from the repository root with Home Assistant installed:
+
+    python -m benchmarks.binary_sensor_attributes
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import timedelta
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.template import Template
+
+from custom_components.scrape.binary_sensor import ScrapeBinarySensor
+from custom_components.scrape.coordinator import ScrapeCoordinator
+
+
+class RebuildingBinarySensor(ScrapeBinarySensor):
+    """Updated binary sensor building its state on every read."""
+
+    def _update_cached_state(self) -> None:
+        """Nothing is cached."""
+
+    @property
+    def icon(self) -> str:
+        """Icon."""
+        if self.coordinator.old_value[self.sensor_name] != "":
+            return "mdi:eye-plus-outline"
+
+        return "mdi:eye-outline"
+
+    @property
+    def is_on(self) -> bool:
+        """Get the state."""
+        return self.coordinator.updated[self.sensor_name]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Extra state attributes."""
+        new_value = self.coordinator.new_value[self.sensor_name]
+        old_value = self.coordinator.old_value[self.sensor_name]
+        attr: dict[str, Any] = {
+            "resource": self.resource,
+            "new_value": new_value,
+            "old_value": old_value,
+        }
+
+        if old_value != "":
+            attr["markdown"] = (
+                '<font color= dodgerblue><ha-icon icon="mdi:eye-plus-outline"></ha-icon></font>'
+                f" [{self.sensor_name.capitalize()}]({self.resource})"
+                f" value updated to **'{new_value}'**"
+                f" from '{old_value}'"
+            )
+        else:
+            attr["markdown"] = (
+                '<font color= dodgerblue><ha-icon icon="mdi:eye-outline"></ha-icon></font>'
+                f" [{self.sensor_name.capitalize()}]({self.resource})"
+                f" value **'{new_value}'**"
+            )
+
+        return attr
+
+
+def run(
+    hass: HomeAssistant,
+    sensor_class: type[ScrapeBinarySensor],
+    sensors: int,
+    updates: int,
+    changed: bool,
+    write: bool,
+) -> float:
+    """Return the seconds to update all sensors for every coordinator update."""
+    coordinator = ScrapeCoordinator(hass, {"": []}, timedelta(minutes=10), {})
+    coordinator.data = {}
+    entities: list[ScrapeBinarySensor] = []
+    for index in range(sensors):
+        name = f"Sensor {index}"
+        coordinator.new_value[name] = "1"
+        coordinator.old_value[name] = ""
+        coordinator.updated[name] = False
+        entity = sensor_class(
+            hass,
+            coordinator,
+            {},
+            f"https://example.com/{index}",
+            Template(name, hass),
+            f"unique_{index}",
+            "",
+            "div",
+            None,
+            0,
+            None,
+        )
+        entity.hass = hass
+        entity.entity_id = f"binary_sensor.{sensor_class.__name__.lower()}_{index}"
+        entities.append(entity)
+
+    start = time.perf_counter()
+    for update in range(updates):
+        if changed:
+            for index in range(sensors):
+                name = f"Sensor {index}"
+                coordinator.old_value[name] = coordinator.new_value[name]
+                coordinator.new_value[name] = str(update)
+                coordinator.updated[name] = True
+        for entity in entities:
+            if write:
+                entity._handle_coordinator_update()
+            else:
+                entity._update_cached_state()
+                _ = (entity.icon, entity.is_on, entity.extra_state_attributes)
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sensors", type=int, default=500)
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    # Entities are written without a platform
+    logging.disable(logging.WARNING)
+    hass = HomeAssistant()
+    count = args.sensors * args.updates
+
+    print(f"{args.sensors} binary sensors, {args.updates} coordinator updates")
+    for write in (False, True):
+        for changed in (False, True):
+            cached, rebuilt = (
+                min(
+                    run(hass, sensor_class, args.sensors, args.updates, changed, write)
+                    for _ in range(args.rounds)
+                )
+                for sensor_class in (ScrapeBinarySensor, RebuildingBinarySensor)
+            )
+            print(
+                f"{'state writes' if write else 'property reads'}, "
+                f"{'changed' if changed else 'unchanged'} values: "
+                f"cached {cached / count * 1e6:.2f} us, "
+                f"built on read {rebuilt / count * 1e6:.2f} us per sensor"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""Benchmark matching the selectors of all sensors in one traversal.
+
+Extracts the values of a growing number of sensors from a large table, once
+with the combined ScrapeMatcher of the coordinator and once with every
+selector matched on its own like before the matcher. Both run in turn for
+several rounds and the best round of each is shown.
+
+Run from the repository root with Home Assistant installed:
+
+    python -m benchmarks.combined_matcher
+"""
+from __future__ import annotations
+
+import argparse
+from collections.abc import Callable
+from functools import partial
+import time
+
+from bs4 import BeautifulSoup
+
+from custom_components.scrape.const import CONF_BS_SEARCH_SELECT
+from custom_components.scrape.extract import ScrapeMatcher, ScrapeSelector
+
+
+def make_page(rows: int) -> str:
+    """Return a page with a table of the given number of rows."""
+    body = "".join(
+        f'<tr id="row-{row}"><td class="name">Item {row}</td>'
+        f'<td class="price">{row}.50</td><td class="stock">{row % 7}</td></tr>'
+        for row in range(rows)
+    )
+    return f"<html><body><table>{body}</table></body></html>"
+
+
+def make_selectors(sensors: int, rows: int) -> dict[str, ScrapeSelector]:
+    """Return selectors of prices spread over the table."""
+    return {
+        f"sensor_{sensor}": ScrapeSelector(
+            CONF_BS_SEARCH_SELECT,
+            f"#row-{sensor * rows // sensors} td.price",
+        )
+        for sensor in range(sensors)
+    }
+
+
+def extract_one_by_one(
+    soup: BeautifulSoup, selectors: dict[str, ScrapeSelector]
+) -> dict[str, str]:
+    """Extract the value of every selector on its own."""
+    return {key: selector.extract(soup) for key, selector in selectors.items()}
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--sensors", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    soup = BeautifulSoup(make_page(args.rows), "lxml")
+    print(f"{args.rows} table rows")
+    for sensors in args.sensors:
+        selectors = make_selectors(sensors, args.rows)
+        matcher = ScrapeMatcher(selectors)
+        # The coordinator keeps its matcher, the selectors are compiled once
+        values, _ = matcher.extract(soup)
+        assert values == extract_one_by_one(soup, selectors)
+
+        runs: tuple[Callable[[], object], ...] = (
+            partial(matcher.extract, soup),
+            partial(extract_one_by_one, soup, selectors),
+        )
+        times: list[list[float]] = [[], []]
+        for _ in range(args.rounds):
+            for run, run_times in zip(runs, times):
+                start = time.perf_counter()
+                run()
+                run_times.append(time.perf_counter() - start)
+        combined, one_by_one = (min(run_times) for run_times in times)
+        print(
+            f"{sensors} sensors: combined {combined * 1e3:.1f} ms, "
+            f"one by one {one_by_one * 1e3:.1f} ms, {one_by_one / combined:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
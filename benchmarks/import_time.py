@@ -0,0 +1,71 @@
+"""Benchmark the import time of the integration.
+
+Imports the modules Home Assistant loads for scrape in a new interpreter,
+checks that bs4, lxml and soupsieve are not imported with them and times
+importing those packages afterwards, as the first parse does. The best of
+several interpreters is shown.
+
+Run from the repository root with Home Assistant installed:
+
+    python -m benchmarks.import_time
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+MODULES = [
+    "custom_components.scrape",
+    "custom_components.scrape.sensor",
+    "custom_components.scrape.binary_sensor",
+    "custom_components.scrape.config_flow",
+    "custom_components.scrape.diagnostics",
+]
+
+PARSER_PACKAGES = ["bs4", "lxml", "soupsieve"]
+
+CODE = f"""
+import importlib
+import sys
+import time
+
+start = time.perf_counter()
+for module in {MODULES!r}:
+    importlib.import_module(module)
+scrape = time.perf_counter() - start
+loaded = [package for package in {PARSER_PACKAGES!r} if package in sys.modules]
+
+start = time.perf_counter()
+import bs4, lxml.etree, soupsieve
+parser = time.perf_counter() - start
+print(scrape, parser, ",".join(loaded))
+"""
+
+
+def run() -> tuple[float, float, list[str]]:
+    """Return the import times and the parser packages imported by scrape."""
+    output = subprocess.run(
+        [sys.executable, "-c", CODE], capture_output=True, check=True, text=True
+    ).stdout.split()
+    return float(output[0]), float(output[1]), output[2:3]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    results = [run() for _ in range(args.rounds)]
+    loaded = sorted({package for *_, packages in results for package in packages})
+    print(
+        f"scrape modules {min(scrape for scrape, *_ in results) * 1e3:.0f} ms, "
+        f"bs4, lxml and soupsieve on the first parse "
+        f"{min(parser for _, parser, _ in results) * 1e3:.0f} ms"
+    )
+    print(f"parser packages imported with scrape: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark updating the kept document of a changed page.
+
+Changes one table row, a timestamp and the contents of two large boxes of a
+page between updates and extracts the values of a few sensors, once updating
+the kept document with the changed blocks and once parsing the page in full.
+The values of both are compared, including selectors on the boxes holding
+the changed tags. The size of the kept block digests is shown next to the
+size of the page.
+
+Run from the repository root with Home Assistant installed:
+
+    python -m benchmarks.incremental_parse
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import time
+
+from custom_components.scrape.extract import ScrapeMatcher, ScrapeSelector
+from custom_components.scrape.incremental import KeptBlocks
+from custom_components.scrape.parser import (
+    ScrapeResult,
+    parse_and_extract,
+    update_and_extract,
+)
+
+
+def make_box(name: str, hot: bool, sale: bool) -> str:
+    """Return a box large enough to be split into its children."""
+    filler = "".join(f"<p>Line {line} of box {name}</p>" for line in range(100))
+    heat = '<span class="hot">Hot</span>' if hot else "Cold"
+    offer = "SALE" if sale else "Regular"
+    return (
+        f'<div class="box" id="{name}">{filler}'
+        f"<p>{heat}</p><p>{offer}</p>{filler}</div>\n"
+    )
+
+
+def make_page(prices: list[int], stamp: int, hot: str, sale: str) -> str:
+    """Return a page with a timestamp, two boxes and a table of prices."""
+    rows = "\n".join(
+        f'<tr id="row-{row}"><td class="name">Item {row}</td>'
+        f'<td class="price">{price}</td></tr>'
+        for row, price in enumerate(prices)
+    )
+    boxes = "".join(make_box(name, name == hot, name == sale) for name in "AB")
+    return (
+        "<!DOCTYPE html>\n<html><head><title>Prices</title></head><body>\n"
+        f'<div id="stamp">{stamp}</div>\n{boxes}'
+        f"<table><tbody>\n{rows}\n</tbody></table>\n</body></html>\n"
+    )
+
+
+def kept_size(blocks: KeptBlocks) -> int:
+    """Return the bytes of the digests and node counts of the kept blocks."""
+    return (
+        len(blocks.digests)
+        + blocks.counts.itemsize * len(blocks.counts)
+        + sum(kept_size(element) for _, element in blocks.elements.values())
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=50)
+    args = parser.parse_args()
+
+    # The selectors on the boxes do not always match
+    logging.disable(logging.WARNING)
+    matcher = ScrapeMatcher(
+        {
+            "stamp": ScrapeSelector.from_config({"select": "#stamp"}),
+            "first": ScrapeSelector.from_config({"select": "#row-0 td.price"}),
+            "last": ScrapeSelector.from_config(
+                {"select": f"#row-{args.rows - 1} td.price"}
+            ),
+            "hot": ScrapeSelector.from_config(
+                {"select": "div.box:has(span.hot)", "attribute": "id"}
+            ),
+            "sale": ScrapeSelector.from_config(
+                {"select": "div.box:-soup-contains('SALE')", "attribute": "id"}
+            ),
+        }
+    )
+    random.seed(0)
+    prices = [random.randrange(100) for _ in range(args.rows)]
+    text = make_page(prices, 0, "A", "A")
+    result: ScrapeResult = update_and_extract(text, matcher, None)
+    assert result.blocks is not None
+    print(
+        f"{args.rows} table rows, page {len(text)} characters, "
+        f"kept blocks {kept_size(result.blocks.blocks)} bytes"
+    )
+
+    incremental = full = 0.0
+    for update in range(1, args.updates + 1):
+        prices[random.randrange(args.rows)] = random.randrange(100)
+        # The boxes lose and gain the tags and text their selectors match
+        text = make_page(prices, update, random.choice("AB-"), random.choice("AB-"))
+
+        start = time.perf_counter()
+        result = update_and_extract(text, matcher, result)
+        incremental += time.perf_counter() - start
+        assert result.blocks is not None
+
+        start = time.perf_counter()
+        parsed = parse_and_extract([text], matcher)
+        full += time.perf_counter() - start
+        assert result.values == parsed.values
+
+    print(
+        f"incremental {incremental / args.updates * 1e3:.1f} ms/update, "
+        f"full {full / args.updates * 1e3:.1f} ms/update, "
+        f"{full / incremental:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
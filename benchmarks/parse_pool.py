@@ -0,0 +1,108 @@
+"""Benchmark parsing in the thread pool against the process pool.
+
+Parses several large pages at once with parse_and_extract in the scrape
+parse pool, once in threads and once in spawned processes. A task on the
+event loop sleeps in short steps meanwhile and records how late it wakes
+up, as other work of Home Assistant would. The workers are started before
+the timed jobs.
+
+Run from the repository root with Home Assistant installed:
+
+    python -m benchmarks.parse_pool
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.scrape.const import PARSE_WORKERS
+from custom_components.scrape.extract import ScrapeMatcher, ScrapeSelector
+from custom_components.scrape.parser import (
+    DATA_PARSE_EXECUTORS,
+    async_add_parse_job,
+    parse_and_extract,
+)
+
+TICK = 0.01
+
+
+def make_page(rows: int, page: int) -> str:
+    """Return a page with a table of the given number of rows."""
+    body = "".join(
+        f'<tr id="row-{row}"><td class="name">Item {page}-{row}</td>'
+        f'<td class="price">{row}.50</td></tr>'
+        for row in range(rows)
+    )
+    return f"<html><body><table>{body}</table></body></html>"
+
+
+async def measure_lag(done: asyncio.Event) -> float:
+    """Return the longest delay of waking up on the event loop in seconds."""
+    longest = 0.0
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        longest = max(longest, time.perf_counter() - start - TICK)
+    return longest
+
+
+async def run(
+    hass: HomeAssistant, in_process: bool, pages: list[str], matcher: ScrapeMatcher
+) -> tuple[float, float]:
+    """Return the seconds to parse all pages and the longest event loop delay."""
+    # Start the workers and compile the selectors
+    await asyncio.gather(
+        *(
+            async_add_parse_job(hass, in_process, parse_and_extract, pages[:1], matcher)
+            for _ in range(PARSE_WORKERS)
+        )
+    )
+
+    done = asyncio.Event()
+    lag = asyncio.create_task(measure_lag(done))
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            async_add_parse_job(hass, in_process, parse_and_extract, [page], matcher)
+            for page in pages
+        )
+    )
+    elapsed = time.perf_counter() - start
+    done.set()
+    return elapsed, await lag
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--pages", type=int, default=8)
+    args = parser.parse_args()
+
+    hass = HomeAssistant()
+    pages = [make_page(args.rows, page) for page in range(args.pages)]
+    print(
+        f"{args.pages} pages of {len(pages[0])} characters, "
+        f"{PARSE_WORKERS} workers, {os.cpu_count()} CPUs"
+    )
+    for in_process in (False, True):
+        matcher = ScrapeMatcher(
+            {"price": ScrapeSelector.from_config({"select": "#row-10 td.price"})}
+        )
+        elapsed, lag = await run(hass, in_process, pages, matcher)
+        print(
+            f"{'process' if in_process else 'thread'} pool: "
+            f"{elapsed / args.pages * 1e3:.0f} ms/page, "
+            f"event loop delayed up to {lag * 1e3:.0f} ms"
+        )
+
+    for executor in hass.data[DATA_PARSE_EXECUTORS].values():
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,50 +2,111 @@
 from __future__ import annotations
 
 import asyncio
-from collections.abc import Coroutine
+from collections.abc import Coroutine, Mapping
+import copy
 from datetime import timedelta
-from typing import Any
+import logging
+from typing import Any, cast
 
+import httpx
 import voluptuous as vol
 
-from homeassistant.components.rest import RESOURCE_SCHEMA, create_rest_data_from_config
+from homeassistant.components.rest import RESOURCE_SCHEMA
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_ATTRIBUTE,
+    CONF_NAME,
+    CONF_RESOURCE,
+    CONF_RESOURCE_TEMPLATE,
     CONF_SCAN_INTERVAL,
+    CONF_UNIQUE_ID,
     CONF_VALUE_TEMPLATE,
     Platform,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import discovery
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import discovery, template
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entity_platform import async_get_platforms
+from homeassistant.helpers.template import Template
 from homeassistant.helpers.template_entity import TEMPLATE_SENSOR_BASE_SCHEMA
 from homeassistant.helpers.typing import ConfigType
 
 from .const import (
+    ATTR_RESULTS,
+    CONF_ACCEPT_ENCODING,
     CONF_BS_SEARCH_SELECT,
     CONF_BS_SEARCH_TYPE,
     CONF_BS_SEARCH_TYPES,
     CONF_CLEAR_UPDATED_BIN_SENSOR_AFTER,
+    CONF_CONFIG_ENTRY_ID,
+    CONF_DATE_FORMAT,
+    CONF_EXTRA_ATTRIBUTES,
     CONF_INDEX,
+    CONF_ITEM,
+    CONF_ITEMS,
+    CONF_MATCHES_LIMIT,
+    CONF_MAX_AGE,
     CONF_NICKNAME,
+    CONF_NUMBER_FORMAT,
+    CONF_PAGES,
+    CONF_PARSE_IN_PROCESS,
+    CONF_REGEX,
+    CONF_SCALE,
     CONF_SELECT,
+    CONF_SELECTORS,
+    CONF_STRIP,
+    CONF_SUB_SELECTORS,
+    CONTENT_ENCODINGS,
+    DEFAULT_PAGES,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
+    ITEM_PLACEHOLDER,
+    NUMBER_FORMATS,
+    PAGE_PLACEHOLDER,
     PLATFORMS,
+    SERVICE_EXTRACT,
+    SIGNAL_ADD_SENSORS,
 )
 from .coordinator import ScrapeCoordinator
+from .data import ScrapeRestData, create_scrape_client, create_scrape_rest_data
+from .extract import ScrapeSelector
+
+_LOGGER = logging.getLogger(__name__)
+
+# Options of a sensor that select and process the value
+SELECTOR_SCHEMA = {
+    vol.Optional(CONF_ATTRIBUTE): cv.string,
+    vol.Optional(CONF_INDEX, default=0): cv.positive_int,
+    vol.Required(CONF_SELECT): cv.string,
+    vol.Required(CONF_BS_SEARCH_TYPE, default=CONF_BS_SEARCH_SELECT): vol.In(
+        CONF_BS_SEARCH_TYPES
+    ),
+    # KGN start
+    vol.Optional(CONF_EXTRA_ATTRIBUTES, default=[]): vol.All(
+        cv.ensure_list, [cv.string]
+    ),
+    vol.Optional(CONF_MATCHES_LIMIT, default=0): cv.positive_int,
+    vol.Optional(CONF_SUB_SELECTORS, default={}): {cv.string: cv.string},
+    vol.Optional(CONF_STRIP, default=False): cv.boolean,
+    vol.Optional(CONF_REGEX): cv.string,
+    vol.Optional(CONF_NUMBER_FORMAT): vol.In(NUMBER_FORMATS),
+    vol.Optional(CONF_SCALE): vol.Coerce(float),
+    vol.Optional(CONF_DATE_FORMAT): cv.string,
+    # KGN end
+}
 
 SENSOR_SCHEMA = vol.Schema(
     {
         **TEMPLATE_SENSOR_BASE_SCHEMA.schema,
-        vol.Optional(CONF_ATTRIBUTE): cv.string,
-        vol.Optional(CONF_INDEX, default=0): cv.positive_int,
-        vol.Required(CONF_SELECT): cv.string,
-        vol.Required(CONF_BS_SEARCH_TYPE, default=CONF_BS_SEARCH_SELECT): vol.In(
-            CONF_BS_SEARCH_TYPES
-        ),
+        **SELECTOR_SCHEMA,
         vol.Optional(CONF_VALUE_TEMPLATE): cv.template,
         # KGN start
         vol.Required(CONF_CLEAR_UPDATED_BIN_SENSOR_AFTER): cv.positive_int,
@@ -58,6 +119,14 @@ COMBINED_SCHEMA = vol.Schema(
         vol.Optional(CONF_SCAN_INTERVAL): cv.positive_int,
         # KGN Start
         vol.Optional(CONF_NICKNAME): cv.string,
+        vol.Optional(CONF_PAGES, default=DEFAULT_PAGES): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+        vol.Optional(CONF_ITEMS, default=[]): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_PARSE_IN_PROCESS, default=False): cv.boolean,
+        vol.Optional(CONF_ACCEPT_ENCODING, default=CONTENT_ENCODINGS): vol.All(
+            cv.ensure_list, [vol.In(CONTENT_ENCODINGS)]
+        ),
         # KGN end
         **RESOURCE_SCHEMA,
         vol.Optional(SENSOR_DOMAIN): vol.All(
@@ -71,22 +140,194 @@ CONFIG_SCHEMA = vol.Schema(
     extra=vol.ALLOW_EXTRA,
 )
 
+EXTRACT_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(CONF_SELECTORS): vol.All(
+            cv.ensure_list, vol.Length(min=1), [vol.Schema(SELECTOR_SCHEMA)]
+        ),
+        vol.Optional(CONF_ITEM, default=""): cv.string,
+        vol.Optional(CONF_MAX_AGE): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+
+def format_resource(resource: str, item: str = "", page: int = 1) -> str:
+    """Insert item and page number into the resource url."""
+    return resource.replace(ITEM_PLACEHOLDER, item).replace(
+        PAGE_PLACEHOLDER, str(page)
+    )
+
+
+def resource_items(rest_config: Mapping[str, Any]) -> list[str]:
+    """Return the items the resource fans out to.
+
+    Without items, or without an `{item}` placeholder in the resource, the
+    resource is a single target with the empty item.
+    """
+    items: list[str] = rest_config.get(CONF_ITEMS) or []
+    resource: str | None = rest_config.get(CONF_RESOURCE)
+    if not items or resource is None or ITEM_PLACEHOLDER not in resource:
+        return [""]
+    return items
+
+
+def item_sensor_config(
+    hass: HomeAssistant, sensor_config: ConfigType, item: str
+) -> ConfigType:
+    """Return the sensor config with the item appended to the name."""
+    if not item:
+        return sensor_config
+
+    name: Template = sensor_config[CONF_NAME]
+    return {**sensor_config, CONF_NAME: Template(f"{name.template} {item}", hass)}
+
+
+def item_unique_id(unique_id: str, item: str) -> str:
+    """Return the unique id of the sensor for the item."""
+    if not item:
+        return unique_id
+
+    return f"{unique_id}_{item}"
+
+
+def selector_key(index: int, sensor_config: ConfigType) -> str:
+    """Return the key of the sensor value in the coordinator results."""
+    return cast(str, sensor_config.get(CONF_UNIQUE_ID) or str(index))
+
+
+def create_selectors(sensors_config: list[ConfigType]) -> dict[str, ScrapeSelector]:
+    """Create the selectors of all sensors of the resource."""
+    return {
+        selector_key(index, sensor_config): ScrapeSelector.from_config(sensor_config)
+        for index, sensor_config in enumerate(sensors_config)
+    }
+
+
+def create_rest_data_pages(
+    hass: HomeAssistant,
+    rest_config: ConfigType,
+    item: str = "",
+    client: httpx.AsyncClient | None = None,
+) -> list[ScrapeRestData]:
+    """Create ScrapeRestData for every page of the resource for one item.
+
+    A `{page}` placeholder in the resource is replaced by the page numbers
+    1 to `pages`, a resource without the placeholder is fetched once.
+    An `{item}` placeholder is replaced by the item.
+    """
+    resource: str | None = rest_config.get(CONF_RESOURCE)
+
+    if resource is None:
+        return [create_scrape_rest_data(hass, rest_config, client)]
+
+    pages: int = (
+        rest_config.get(CONF_PAGES, DEFAULT_PAGES)
+        if PAGE_PLACEHOLDER in resource
+        else 1
+    )
+    return [
+        create_scrape_rest_data(
+            hass,
+            {**rest_config, CONF_RESOURCE: format_resource(resource, item, page)},
+            client,
+        )
+        for page in range(1, pages + 1)
+    ]
+
+
+def create_rest_data_targets(
+    hass: HomeAssistant, rest_config: ConfigType
+) -> dict[str, list[ScrapeRestData]]:
+    """Create the pages of every item the resource fans out to.
+
+    Without items the resource is a single target with the empty item. The
+    pages of all items share one client.
+    """
+    items = resource_items(rest_config)
+    if rest_config.get(CONF_ITEMS) and items == [""]:
+        _LOGGER.warning(
+            "The items of %s are ignored, the resource has no %s placeholder",
+            rest_config.get(CONF_RESOURCE) or rest_config.get(CONF_RESOURCE_TEMPLATE),
+            ITEM_PLACEHOLDER,
+        )
+    client = create_scrape_client(hass, rest_config)
+    return {
+        item: create_rest_data_pages(hass, rest_config, item, client) for item in items
+    }
+
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up Scrape from yaml config."""
+
+    async def async_extract(call: ServiceCall) -> ServiceResponse:
+        """Extract values with other selectors from the pages of a config entry.
+
+        The values are extracted from the pages the entry already fetched, in
+        one parse job and without creating entities.
+        """
+        entry_id: str = call.data[CONF_CONFIG_ENTRY_ID]
+        coordinator: ScrapeCoordinator | None = hass.data.get(DOMAIN, {}).get(
+            entry_id
+        )
+        if coordinator is None:
+            raise HomeAssistantError(f"Scrape config entry {entry_id} is not loaded")
+
+        item: str = call.data[CONF_ITEM]
+        if item not in coordinator.items:
+            raise HomeAssistantError(
+                f"Unknown item '{item}', expected one of {coordinator.items}"
+            )
+
+        selectors: dict[str, ScrapeSelector] = {
+            str(index): ScrapeSelector.from_config(selector_config)
+            for index, selector_config in enumerate(call.data[CONF_SELECTORS])
+        }
+        result = await coordinator.async_extract(
+            item, selectors, call.data.get(CONF_MAX_AGE)
+        )
+        if result is None:
+            raise HomeAssistantError(
+                f"The pages of scrape config entry {entry_id} are not available"
+            )
+
+        return {
+            ATTR_RESULTS: [
+                {
+                    "value": result.values.get(key),
+                    "attributes": result.attributes.get(key, {}),
+                }
+                for key in selectors
+            ]
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXTRACT,
+        async_extract,
+        schema=EXTRACT_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
     scrape_config: list[ConfigType] | None
     if not (scrape_config := config.get(DOMAIN)):
         return True
 
     load_coroutines: list[Coroutine[Any, Any, None]] = []
     for resource_config in scrape_config:
-        rest = create_rest_data_from_config(hass, resource_config)
+        rest_targets = create_rest_data_targets(hass, resource_config)
         scan_interval: timedelta = timedelta(
             minutes=resource_config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
         )
-        coordinator = ScrapeCoordinator(hass, rest, scan_interval)
-
         sensors: list[ConfigType] = resource_config.get(SENSOR_DOMAIN, [])
+        coordinator = ScrapeCoordinator(
+            hass,
+            rest_targets,
+            scan_interval,
+            create_selectors(sensors),
+            resource_config[CONF_PARSE_IN_PROCESS],
+        )
+
         if sensors:
             load_coroutines.append(
                 discovery.async_load_platform(
@@ -108,13 +349,22 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Scrape from a config entry."""
 
     rest_config: dict[str, Any] = COMBINED_SCHEMA(dict(entry.options))
-    rest = create_rest_data_from_config(hass, rest_config)
+    rest_targets = create_rest_data_targets(hass, rest_config)
+    sensor_configs: dict[str, ConfigType] = {
+        sensor_config[CONF_UNIQUE_ID]: sensor_config
+        for sensor_config in rest_config.get(SENSOR_DOMAIN, [])
+    }
+    template.attach(hass, sensor_configs)
 
     coordinator = ScrapeCoordinator(
         hass,
-        rest,
+        rest_targets,
         timedelta(minutes=rest_config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)),
+        create_selectors(list(sensor_configs.values())),
+        rest_config[CONF_PARSE_IN_PROCESS],
     )
+    coordinator.entry_options = copy.deepcopy(dict(entry.options))
+    coordinator.sensor_configs = sensor_configs
 
     await coordinator.async_config_entry_first_refresh()
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
@@ -134,6 +384,90 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+def resource_options(options: Mapping[str, Any]) -> dict[str, Any]:
+    """Return the options of the resource without the sensors."""
+    return {key: value for key, value in options.items() if key != SENSOR_DOMAIN}
+
+
+async def async_remove_sensor_entities(
+    hass: HomeAssistant, entry: ConfigEntry, items: list[str], unique_ids: set[str]
+) -> None:
+    """Remove the entities of the sensors of all items from the platforms."""
+    entity_unique_ids: set[str] = {
+        item_unique_id(unique_id, item) for unique_id in unique_ids for item in items
+    }
+    entity_unique_ids |= {f"{unique_id}_updated" for unique_id in entity_unique_ids}
+
+    for platform in async_get_platforms(hass, DOMAIN):
+        if (
+            platform.config_entry is None
+            or platform.config_entry.entry_id != entry.entry_id
+        ):
+            continue
+        for entity in list(platform.entities.values()):
+            if entity.unique_id in entity_unique_ids:
+                await platform.async_remove_entity(entity.entity_id)
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Handle options update."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Handle options update.
+
+    Added, edited and removed sensors are applied to the running entry and
+    their values are extracted from the pages already fetched. The entry is
+    only reloaded when the resource changed.
+    """
+    coordinator: ScrapeCoordinator = hass.data[DOMAIN][entry.entry_id]
+    old_options: dict[str, Any] = coordinator.entry_options
+
+    if resource_options(old_options) != resource_options(entry.options):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    old_sensors: dict[str, dict[str, Any]] = {
+        sensor[CONF_UNIQUE_ID]: sensor for sensor in old_options.get(SENSOR_DOMAIN, [])
+    }
+    new_sensors: dict[str, dict[str, Any]] = {
+        sensor[CONF_UNIQUE_ID]: sensor
+        for sensor in entry.options.get(SENSOR_DOMAIN, [])
+    }
+    changed: set[str] = {
+        unique_id
+        for unique_id, sensor in new_sensors.items()
+        if old_sensors.get(unique_id) != sensor
+    }
+    removed: set[str] = old_sensors.keys() - new_sensors.keys()
+    if not changed and not removed:
+        return
+
+    try:
+        validated: dict[str, ConfigType] = {
+            unique_id: SENSOR_SCHEMA(new_sensors[unique_id]) for unique_id in changed
+        }
+    except vol.Invalid as err:
+        _LOGGER.error("Invalid sensor options, reloading the entry: %s", err)
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    template.attach(hass, validated)
+
+    coordinator.entry_options = copy.deepcopy(dict(entry.options))
+    await async_remove_sensor_entities(
+        hass, entry, coordinator.items, (changed & old_sensors.keys()) | removed
+    )
+
+    coordinator.sensor_configs = {
+        unique_id: validated.get(unique_id) or coordinator.sensor_configs[unique_id]
+        for unique_id in new_sensors
+    }
+    await coordinator.async_set_selectors(
+        create_selectors(list(coordinator.sensor_configs.values()))
+    )
+
+    async_dispatcher_send(
+        hass,
+        SIGNAL_ADD_SENSORS.format(entry.entry_id),
+        [
+            coordinator.sensor_configs[unique_id]
+            for unique_id in new_sensors
+            if unique_id in changed
+        ],
+    )
@@ -1,26 +1,28 @@
 """Support for Scrape binary sensor."""
 from __future__ import annotations
 
+from collections.abc import Mapping
 import logging
-
-import voluptuous as vol
+from typing import Any
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_ATTRIBUTE,
     CONF_NAME,
+    CONF_RESOURCE,
     CONF_UNIQUE_ID,
     CONF_VALUE_TEMPLATE,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.template import Template
-from homeassistant.helpers.template_entity import TEMPLATE_SENSOR_BASE_SCHEMA
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import CONF_INDEX, CONF_SELECT, DOMAIN
+from . import format_resource, item_sensor_config, item_unique_id
+from .const import CONF_INDEX, CONF_SELECT, DOMAIN, SIGNAL_ADD_SENSORS
 from .coordinator import ScrapeCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -33,41 +35,42 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Scrape sensor entry."""
-    entities: list = []
-
     coordinator: ScrapeCoordinator = hass.data[DOMAIN][entry.entry_id]
-    config = dict(entry.options)
-    for sensor in config["sensor"]:
-        sensor_config: ConfigType = vol.Schema(
-            TEMPLATE_SENSOR_BASE_SCHEMA.schema, extra=vol.ALLOW_EXTRA
-        )(sensor)
-
-        name: Template = sensor_config[CONF_NAME]
-        select: str = sensor_config[CONF_SELECT]
-        attr: str | None = sensor_config.get(CONF_ATTRIBUTE)
-        index: int = int(sensor_config[CONF_INDEX])
-        value_string: str | None = sensor_config.get(CONF_VALUE_TEMPLATE)
-        unique_id: str = sensor_config[CONF_UNIQUE_ID]
-
-        value_template: Template | None = (
-            Template(value_string, hass) if value_string is not None else None
-        )
-        entities.append(
-            ScrapeBinarySensor(
-                hass,
-                coordinator,
-                sensor_config,
-                config["resource"],
-                name,
-                unique_id,
-                select,
-                attr,
-                index,
-                value_template,
-            )
+    resource: str = entry.options[CONF_RESOURCE]
+
+    @callback
+    def async_add_sensors(sensor_configs: list[ConfigType]) -> None:
+        """Add the updated binary sensors of the sensors for all items."""
+        entities: list[ScrapeBinarySensor] = []
+        for sensor_config in sensor_configs:
+            unique_id: str = sensor_config[CONF_UNIQUE_ID]
+            for item in coordinator.items:
+                item_config: ConfigType = item_sensor_config(hass, sensor_config, item)
+
+                entities.append(
+                    ScrapeBinarySensor(
+                        hass,
+                        coordinator,
+                        item_config,
+                        format_resource(resource, item),
+                        item_config[CONF_NAME],
+                        item_unique_id(unique_id, item),
+                        item,
+                        sensor_config[CONF_SELECT],
+                        sensor_config.get(CONF_ATTRIBUTE),
+                        sensor_config[CONF_INDEX],
+                        sensor_config.get(CONF_VALUE_TEMPLATE),
+                    )
+                )
+
+        async_add_entities(entities)
+
+    async_add_sensors(list(coordinator.sensor_configs.values()))
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_ADD_SENSORS.format(entry.entry_id), async_add_sensors
         )
-
-    async_add_entities(entities)
+    )
 
 
 # ------------------------------------------------------
@@ -84,6 +87,7 @@ class ScrapeBinarySensor(CoordinatorEntity[ScrapeCoordinator], BinarySensorEntit
         resource: str,
         name: Template,
         unique_id: str,
+        item: str,
         select: str,
         attr: str | None,
         index: int,
@@ -92,6 +96,7 @@ class ScrapeBinarySensor(CoordinatorEntity[ScrapeCoordinator], BinarySensorEntit
         """Initialize a web scrape sensor."""
         CoordinatorEntity.__init__(self, coordinator)
         self.resource: str = resource
+        self._item = item
         self._select = select
         self._attr = attr
         self._index = index
@@ -101,6 +106,14 @@ class ScrapeBinarySensor(CoordinatorEntity[ScrapeCoordinator], BinarySensorEntit
         self._name: str = name.template + " Updated"
         self._unique_id: str = unique_id + "_updated"
 
+        # State derived from the coordinator values, rebuilt only when they change
+        self._markdown_name: str = self.sensor_name.capitalize()
+        self._cache_key: tuple[str, str, bool] | None = None
+        self._icon: str = "mdi:eye-outline"
+        self._is_on: bool = False
+        # A dict, Home Assistant copies the attributes into the state faster
+        self._attributes: Mapping[str, Any] = {}
+
     # ------------------------------------------------------
     @property
     def name(self) -> str:
@@ -111,42 +124,58 @@ class ScrapeBinarySensor(CoordinatorEntity[ScrapeCoordinator], BinarySensorEntit
     @property
     def icon(self) -> str:
         """Icon."""
-        if self.coordinator.old_value[self.sensor_name] != "":
-            return "mdi:eye-plus-outline"
-
-        return "mdi:eye-outline"
+        return self._icon
 
     # ------------------------------------------------------
     @property
     def is_on(self) -> bool:
         """Get the state."""
-        return self.coordinator.updated[self.sensor_name]
+        return self._is_on
 
     # ------------------------------------------------------
     @property
-    def extra_state_attributes(self) -> dict:
+    def extra_state_attributes(self) -> Mapping[str, Any]:
         """Extra state attributes."""
-        attr: dict = {}
+        return self._attributes
 
-        attr["resource"] = self.resource
-        attr["new_value"] = self.coordinator.new_value[self.sensor_name]
-        attr["old_value"] = self.coordinator.old_value[self.sensor_name]
+    # ------------------------------------------------------
+    def _update_cached_state(self) -> None:
+        """Rebuild icon, state and attributes when the tracked value changed."""
+        key: tuple[str, str, bool] = (
+            self.coordinator.new_value.get(self.sensor_name, ""),
+            self.coordinator.old_value.get(self.sensor_name, ""),
+            self.coordinator.updated.get(self.sensor_name, False),
+        )
+
+        if key == self._cache_key:
+            return
 
-        if self.coordinator.old_value[self.sensor_name] != "":
-            attr["markdown"] = (
+        self._cache_key = key
+        new_value, old_value, updated = key
+        self._is_on = updated
+
+        if old_value != "":
+            self._icon = "mdi:eye-plus-outline"
+            markdown: str = (
                 '<font color= dodgerblue><ha-icon icon="mdi:eye-plus-outline"></ha-icon></font>'
-                f" [{self.sensor_name.capitalize()}]({self.resource})"
-                f" value updated to **'{self.coordinator.new_value[self.sensor_name]}'**"
-                f" from '{self.coordinator.old_value[self.sensor_name]}'"
+                f" [{self._markdown_name}]({self.resource})"
+                f" value updated to **'{new_value}'**"
+                f" from '{old_value}'"
             )
         else:
-            attr["markdown"] = (
+            self._icon = "mdi:eye-outline"
+            markdown = (
                 '<font color= dodgerblue><ha-icon icon="mdi:eye-outline"></ha-icon></font>'
-                f" [{self.sensor_name.capitalize()}]({self.resource})"
-                f" value **'{self.coordinator.new_value[self.sensor_name]}'**"
+                f" [{self._markdown_name}]({self.resource})"
+                f" value **'{new_value}'**"
             )
 
-        return attr
+        self._attributes = {
+            "resource": self.resource,
+            "new_value": new_value,
+            "old_value": old_value,
+            "markdown": markdown,
+        }
 
     # ------------------------------------------------------
     @property
@@ -163,8 +192,11 @@ class ScrapeBinarySensor(CoordinatorEntity[ScrapeCoordinator], BinarySensorEntit
     # ------------------------------------------------------
     @property
     def available(self) -> bool:
-        """Return if entity is available."""
-        return self.coordinator.last_update_success
+        """Return if the document of the item was fetched."""
+        return (
+            self.coordinator.last_update_success
+            and self._item in self.coordinator.data
+        )
 
     # ------------------------------------------------------
     async def async_update(self) -> None:
@@ -174,6 +206,12 @@ class ScrapeBinarySensor(CoordinatorEntity[ScrapeCoordinator], BinarySensorEntit
     # ------------------------------------------------------
     async def async_added_to_hass(self) -> None:
         """When entity is added to hass."""
-        self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
-        )
+        await super().async_added_to_hass()
+        self._update_cached_state()
+
+    # ------------------------------------------------------
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._update_cached_state()
+        self.async_write_ha_state()
@@ -0,0 +1,121 @@
+"""Circuit breaker for failing resources of the scrape component."""
+from __future__ import annotations
+
+from enum import StrEnum
+import logging
+from time import monotonic
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import BACKOFF_INITIAL, BACKOFF_MAX, BREAKER_FAILURE_THRESHOLD
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_CIRCUIT_BREAKERS = "scrape_circuit_breakers"
+
+
+class BreakerState(StrEnum):
+    """State of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class ScrapeCircuitBreaker:
+    """Exponential backoff of one resource.
+
+    The circuit opens after BREAKER_FAILURE_THRESHOLD failures in a row and
+    no request is made until the backoff has passed. Then one request is let
+    through half open. A success closes the circuit, a failure opens it again
+    with the double backoff, capped at BACKOFF_MAX.
+
+    The first backoff skips at least one scheduled update, so a failing
+    resource is polled less often than a working one with any scan interval.
+    """
+
+    def __init__(self, resource: str) -> None:
+        """Initialize the circuit breaker."""
+        self._resource = resource
+        self._retry_at: float = 0
+        self.state = BreakerState.CLOSED
+        self.failures: int = 0
+        self.backoff: float = 0
+        self.last_error: str | None = None
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until the next request is let through."""
+        if self.state != BreakerState.OPEN:
+            return 0
+        return max(self._retry_at - monotonic(), 0)
+
+    def allow_request(self) -> bool:
+        """Return True if a request to the resource may be made."""
+        if self.state == BreakerState.CLOSED:
+            return True
+
+        if self.state == BreakerState.OPEN and monotonic() >= self._retry_at:
+            self.state = BreakerState.HALF_OPEN
+            _LOGGER.debug("Trying %s again", self._resource)
+            return True
+
+        # Open, or half open with the trial request still running
+        return False
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        if self.state != BreakerState.CLOSED:
+            _LOGGER.info("%s is available again", self._resource)
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.backoff = 0
+        self.last_error = None
+
+    def record_failure(self, error: str | None = None, interval: float = 0) -> None:
+        """Count a failure and open the circuit when the threshold is reached.
+
+        The interval is the seconds between the scheduled updates.
+        """
+        self.failures += 1
+        self.last_error = error
+
+        if (
+            self.state == BreakerState.CLOSED
+            and self.failures < BREAKER_FAILURE_THRESHOLD
+        ):
+            return
+
+        initial: float = max(BACKOFF_INITIAL, 2 * interval)
+        self.backoff = min(max(self.backoff * 2, initial), max(BACKOFF_MAX, initial))
+        self._retry_at = monotonic() + self.backoff
+        if self.state == BreakerState.CLOSED:
+            _LOGGER.warning(
+                "Pausing requests to %s after %s failures",
+                self._resource,
+                self.failures,
+            )
+        _LOGGER.debug("Next request to %s in %s seconds", self._resource, self.backoff)
+        self.state = BreakerState.OPEN
+
+    def record_cancelled(self) -> None:
+        """Open the circuit again when the trial request was cancelled.
+
+        A cancelled request, e.g. when Home Assistant stops, says nothing
+        about the resource, so the failures and the backoff are kept.
+        """
+        if self.state == BreakerState.HALF_OPEN:
+            self.state = BreakerState.OPEN
+
+
+@callback
+def async_get_circuit_breaker(
+    hass: HomeAssistant, resource: str
+) -> ScrapeCircuitBreaker:
+    """Return the circuit breaker of the resource shared by all scrape entries."""
+    breakers: dict[str, ScrapeCircuitBreaker] = hass.data.setdefault(
+        DATA_CIRCUIT_BREAKERS, {}
+    )
+    if (breaker := breakers.get(resource)) is None:
+        breaker = breakers[resource] = ScrapeCircuitBreaker(resource)
+    return breaker
@@ -0,0 +1,140 @@
+"""Response cache for the scrape component."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+import logging
+import sys
+from time import monotonic
+
+import httpx
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import RESPONSE_CACHE_MAX_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_RESPONSE_CACHE = "scrape_response_cache"
+
+
+@dataclass
+class CachedResponse:
+    """A decoded response and the time it stays fresh."""
+
+    text: str
+    headers: httpx.Headers
+    status: int
+    expires: float
+    size: int
+
+
+def _parse_http_date(value: str | None) -> datetime | None:
+    """Parse a date header."""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: httpx.Headers) -> float:
+    """Return for how many seconds the response is fresh.
+
+    Cache-Control max-age takes precedence over Expires. Responses marked
+    no-store or no-cache are never fresh.
+    """
+    directives: dict[str, str] = {}
+    for directive in headers.get("cache-control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives or "no-cache" in directives:
+        return 0
+
+    age: float = 0
+    try:
+        age = float(headers.get("age", 0))
+    except ValueError:
+        pass
+
+    if "max-age" in directives:
+        try:
+            return float(directives["max-age"]) - age
+        except ValueError:
+            return 0
+
+    if (expires := _parse_http_date(headers.get("expires"))) is None:
+        return 0
+    if (date := _parse_http_date(headers.get("date"))) is None:
+        return 0
+    try:
+        return (expires - date).total_seconds() - age
+    except TypeError:
+        # Naive and aware dates can not be compared
+        return 0
+
+
+class ScrapeResponseCache:
+    """In memory LRU cache of fresh responses shared by all scrape entries.
+
+    The size is the memory in bytes used by the cached texts, which depends on
+    the characters of the page as well as its length. The least recently used
+    responses are evicted when the size exceeds max_size.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Initialize the cache."""
+        self._max_size = max_size
+        self._size = 0
+        self._responses: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        """Return the cached response if it is still fresh."""
+        if (response := self._responses.get(key)) is None:
+            return None
+
+        if response.expires <= monotonic():
+            self._remove(key)
+            return None
+
+        self._responses.move_to_end(key)
+        return response
+
+    def set(
+        self, key: Hashable, text: str, headers: httpx.Headers, status: int
+    ) -> None:
+        """Cache the response for as long as its headers allow."""
+        self._remove(key)
+
+        lifetime = freshness_lifetime(headers)
+        size = sys.getsizeof(text)
+        if lifetime <= 0 or size > self._max_size:
+            return
+
+        self._responses[key] = CachedResponse(
+            text, headers, status, monotonic() + lifetime, size
+        )
+        self._size += size
+
+        while self._size > self._max_size:
+            self._remove(next(iter(self._responses)))
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove a response from the cache."""
+        if (response := self._responses.pop(key, None)) is not None:
+            self._size -= response.size
+
+
+@callback
+def async_get_response_cache(hass: HomeAssistant) -> ScrapeResponseCache:
+    """Return the response cache shared by all scrape entries."""
+    if (cache := hass.data.get(DATA_RESPONSE_CACHE)) is None:
+        cache = hass.data[DATA_RESPONSE_CACHE] = ScrapeResponseCache(
+            RESPONSE_CACHE_MAX_SIZE
+        )
+    return cache
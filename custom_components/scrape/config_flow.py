@@ -2,12 +2,13 @@
 from __future__ import annotations
 
 from collections.abc import Mapping
-from typing import Any, cast
+import re
+from time import monotonic
+from typing import TYPE_CHECKING, Any, cast
 import uuid
 
 import voluptuous as vol
 
-from homeassistant.components.rest import create_rest_data_from_config
 from homeassistant.components.rest.data import DEFAULT_TIMEOUT
 from homeassistant.components.rest.schema import DEFAULT_METHOD, METHODS
 from homeassistant.components.sensor import (
@@ -36,7 +37,7 @@ from homeassistant.const import (
     HTTP_DIGEST_AUTHENTICATION,
     UnitOfTemperature,
 )
-from homeassistant.core import async_get_hass
+from homeassistant.core import HomeAssistant, async_get_hass
 from homeassistant.helpers import config_validation as cv, entity_registry as er
 from homeassistant.helpers.schema_config_entry_flow import (
     SchemaCommonFlowHandler,
@@ -59,23 +60,54 @@ from homeassistant.helpers.selector import (
     TextSelectorConfig,
     TextSelectorType,
 )
+from homeassistant.helpers.template import Template
 
-from . import COMBINED_SCHEMA
+from . import (
+    COMBINED_SCHEMA,
+    create_rest_data_pages,
+    item_unique_id,
+    resource_items,
+)
 from .const import (  # CONF_SCAN_INTERVAL_USER,
+    CONF_ACCEPT_ENCODING,
     CONF_BS_SEARCH_SELECT,
     CONF_BS_SEARCH_TYPE,
     CONF_BS_SEARCH_TYPES,
     CONF_CLEAR_UPDATED_BIN_SENSOR_AFTER,
+    CONF_DATE_FORMAT,
     CONF_ENCODING,
+    CONF_EXTRA_ATTRIBUTES,
     CONF_INDEX,
+    CONF_ITEMS,
+    CONF_MATCHES_LIMIT,
     CONF_NICKNAME,
+    CONF_NUMBER_FORMAT,
+    CONF_PAGES,
+    CONF_PARSE_IN_PROCESS,
+    CONF_PREVIEW,
+    CONF_PREVIEW_VALUE,
+    CONF_REGEX,
+    CONF_SCALE,
     CONF_SELECT,
+    CONF_STRIP,
+    CONF_SUB_SELECTORS,
+    CONTENT_ENCODINGS,
     DEFAULT_ENCODING,
     DEFAULT_NAME,
+    DEFAULT_PAGES,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_VERIFY_SSL,
     DOMAIN,
+    ITEM_PLACEHOLDER,
+    NUMBER_FORMATS,
+    PAGE_PLACEHOLDER,
+    PREVIEW_CACHE_TTL,
 )
+from .extract import ScrapeSelector, plain_value, selectors_compile
+from .parser import async_add_parse_job, parse_document
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 RESOURCE_SETUP = {
     # KGN start
@@ -109,6 +141,25 @@ RESOURCE_SETUP = {
             min=1, step=1, mode=NumberSelectorMode.BOX, unit_of_measurement="Minutes"
         )
     ),
+    vol.Optional(CONF_ACCEPT_ENCODING, default=CONTENT_ENCODINGS): SelectSelector(
+        SelectSelectorConfig(
+            options=CONTENT_ENCODINGS,
+            multiple=True,
+            mode=SelectSelectorMode.LIST,
+        )
+    ),
+    vol.Optional(CONF_PARSE_IN_PROCESS, default=False): BooleanSelector(),
+    vol.Optional(CONF_PAGES, default=DEFAULT_PAGES): NumberSelector(
+        NumberSelectorConfig(min=1, step=1, mode=NumberSelectorMode.BOX)
+    ),
+    vol.Optional(CONF_ITEMS): SelectSelector(
+        SelectSelectorConfig(
+            options=[],
+            multiple=True,
+            custom_value=True,
+            mode=SelectSelectorMode.DROPDOWN,
+        )
+    ),
     # KGN End
 }
 
@@ -153,30 +204,187 @@ SENSOR_SETUP = {
             min=1, step=1, mode=NumberSelectorMode.BOX, unit_of_measurement="Hours"
         )
     ),
+    vol.Optional(CONF_EXTRA_ATTRIBUTES): SelectSelector(
+        SelectSelectorConfig(
+            options=[],
+            multiple=True,
+            custom_value=True,
+            mode=SelectSelectorMode.DROPDOWN,
+        )
+    ),
+    vol.Optional(CONF_MATCHES_LIMIT, default=0): NumberSelector(
+        NumberSelectorConfig(min=0, step=1, mode=NumberSelectorMode.BOX)
+    ),
+    vol.Optional(CONF_SUB_SELECTORS): ObjectSelector(),
+    vol.Optional(CONF_STRIP, default=False): BooleanSelector(),
+    vol.Optional(CONF_REGEX): TextSelector(),
+    vol.Optional(CONF_NUMBER_FORMAT): SelectSelector(
+        SelectSelectorConfig(
+            options=NUMBER_FORMATS,
+            mode=SelectSelectorMode.DROPDOWN,
+            translation_key="number_formats",
+        )
+    ),
+    vol.Optional(CONF_SCALE): NumberSelector(
+        NumberSelectorConfig(mode=NumberSelectorMode.BOX, step="any")
+    ),
+    vol.Optional(CONF_DATE_FORMAT): TextSelector(),
+    vol.Optional(CONF_PREVIEW, default=False): BooleanSelector(),
+    vol.Optional(CONF_PREVIEW_VALUE): TextSelector(
+        TextSelectorConfig(multiline=True)
+    ),
     # KGN end
 }
 
 
-async def validate_rest_setup(
-    handler: SchemaCommonFlowHandler, user_input: dict[str, Any]
-) -> dict[str, Any]:
-    """Validate rest setup."""
-    hass = async_get_hass()
-    rest_config: dict[str, Any] = COMBINED_SCHEMA(user_input)
+async def async_fetch_resource(
+    hass: HomeAssistant, handler: SchemaCommonFlowHandler, rest_config: dict[str, Any]
+) -> None:
+    """Fetch the first page of the resource and keep it in the flow state.
+
+    The body is reused by the sensor preview until it is older than
+    PREVIEW_CACHE_TTL seconds.
+    """
+    item: str = resource_items(rest_config)[0]
     try:
-        rest = create_rest_data_from_config(hass, rest_config)
+        rest = create_rest_data_pages(hass, rest_config, item)[0]
         await rest.async_update()
     except Exception as err:
         raise SchemaFlowError("resource_error") from err
     if rest.data is None:
         raise SchemaFlowError("resource_error")
+
+    handler.flow_state["_rest_data"] = rest.data
+    handler.flow_state["_rest_fetched_at"] = monotonic()
+    handler.flow_state.pop("_soup", None)
+
+
+async def async_get_preview_soup(
+    hass: HomeAssistant, handler: SchemaCommonFlowHandler
+) -> BeautifulSoup:
+    """Return the parsed resource, fetching it again only when the cache expired."""
+    fetched_at: float | None = handler.flow_state.get("_rest_fetched_at")
+    if fetched_at is None or monotonic() - fetched_at > PREVIEW_CACHE_TTL:
+        await async_fetch_resource(
+            hass,
+            handler,
+            COMBINED_SCHEMA(
+                {
+                    key: value
+                    for key, value in handler.options.items()
+                    if key != SENSOR_DOMAIN
+                }
+            ),
+        )
+
+    if (soup := handler.flow_state.get("_soup")) is None:
+        soup = handler.flow_state["_soup"] = await async_add_parse_job(
+            hass, False, parse_document, handler.flow_state["_rest_data"]
+        )
+    return cast("BeautifulSoup", soup)
+
+
+async def async_preview_sensor(
+    handler: SchemaCommonFlowHandler, user_input: dict[str, Any]
+) -> None:
+    """Show the value of the sensor instead of saving it if preview is selected.
+
+    The value is put into the preview field of the user input and the form is
+    shown again by raising a SchemaFlowError.
+    """
+    user_input.pop(CONF_PREVIEW_VALUE, None)
+    if not user_input.pop(CONF_PREVIEW, False):
+        return
+
+    hass = async_get_hass()
+    soup = await async_get_preview_soup(hass, handler)
+    selector = ScrapeSelector.from_config(user_input)
+    value: Any = await async_add_parse_job(hass, False, selector.extract, soup)
+    value = selector.processor.process(plain_value(value))
+
+    if (value_string := user_input.get(CONF_VALUE_TEMPLATE)) is not None:
+        value = Template(value_string, hass).async_render_with_possible_json_value(
+            value, None
+        )
+
+    user_input[CONF_PREVIEW_VALUE] = "" if value is None else str(value)
+    raise SchemaFlowError("preview")
+
+
+async def validate_rest_setup(
+    handler: SchemaCommonFlowHandler, user_input: dict[str, Any]
+) -> dict[str, Any]:
+    """Validate rest setup."""
+    hass = async_get_hass()
+    resource: str = user_input[CONF_RESOURCE]
+    user_input[CONF_PAGES] = int(user_input.get(CONF_PAGES, DEFAULT_PAGES))
+    # Without the placeholders every item or page would fetch the same url
+    if user_input.get(CONF_ITEMS) and ITEM_PLACEHOLDER not in resource:
+        raise SchemaFlowError("missing_item_placeholder")
+    if user_input[CONF_PAGES] > 1 and PAGE_PLACEHOLDER not in resource:
+        raise SchemaFlowError("missing_page_placeholder")
+
+    rest_config: dict[str, Any] = COMBINED_SCHEMA(user_input)
+    await async_fetch_resource(hass, handler, rest_config)
     return user_input
 
 
+async def async_validate_multi_value(
+    hass: HomeAssistant, user_input: dict[str, Any]
+) -> None:
+    """Validate the options extracting state attributes.
+
+    The sub selectors are compiled in the parse pool.
+    """
+    user_input[CONF_MATCHES_LIMIT] = int(user_input.get(CONF_MATCHES_LIMIT, 0))
+
+    sub_selectors: Any = user_input.get(CONF_SUB_SELECTORS) or {}
+    if not isinstance(sub_selectors, dict) or not all(
+        isinstance(select, str) for select in sub_selectors.values()
+    ):
+        raise SchemaFlowError("invalid_sub_selectors")
+    user_input[CONF_SUB_SELECTORS] = {
+        str(name): select for name, select in sub_selectors.items()
+    }
+
+    if sub_selectors and not await async_add_parse_job(
+        hass, False, selectors_compile, list(sub_selectors.values())
+    ):
+        raise SchemaFlowError("invalid_sub_selectors")
+
+
+def validate_processing(user_input: dict[str, Any]) -> None:
+    """Validate the processing steps."""
+    if regex := user_input.get(CONF_REGEX):
+        try:
+            re.compile(regex)
+        except re.error as err:
+            raise SchemaFlowError("invalid_regex") from err
+
+
+async def async_validate_selector(
+    hass: HomeAssistant, user_input: dict[str, Any]
+) -> None:
+    """Validate the CSS selector in the parse pool."""
+    search_type: str = user_input.get(CONF_BS_SEARCH_TYPE, CONF_BS_SEARCH_SELECT)
+    if search_type != CONF_BS_SEARCH_SELECT:
+        return
+
+    if not await async_add_parse_job(
+        hass, False, selectors_compile, [user_input[CONF_SELECT]]
+    ):
+        raise SchemaFlowError("invalid_selector")
+
+
 async def validate_sensor_setup(
     handler: SchemaCommonFlowHandler, user_input: dict[str, Any]
 ) -> dict[str, Any]:
     """Validate sensor input."""
+    hass = async_get_hass()
+    await async_validate_multi_value(hass, user_input)
+    validate_processing(user_input)
+    await async_validate_selector(hass, user_input)
+    await async_preview_sensor(handler, user_input)
     user_input[CONF_INDEX] = int(user_input[CONF_INDEX])
     user_input[CONF_UNIQUE_ID] = str(uuid.uuid1())
 
@@ -187,11 +395,20 @@ async def validate_sensor_setup(
     return {}
 
 
+def get_sensor(handler: SchemaCommonFlowHandler, unique_id: str) -> dict[str, Any]:
+    """Return the options of the sensor with the unique id."""
+    return next(
+        sensor
+        for sensor in handler.options[SENSOR_DOMAIN]
+        if sensor[CONF_UNIQUE_ID] == unique_id
+    )
+
+
 async def validate_select_sensor(
     handler: SchemaCommonFlowHandler, user_input: dict[str, Any]
 ) -> dict[str, Any]:
-    """Store sensor index in flow state."""
-    handler.flow_state["_idx"] = int(user_input[CONF_INDEX])
+    """Store the unique id of the sensor in flow state."""
+    handler.flow_state["_unique_id"] = user_input[CONF_UNIQUE_ID]
     return {}
 
 
@@ -199,10 +416,10 @@ async def get_select_sensor_schema(handler: SchemaCommonFlowHandler) -> vol.Sche
     """Return schema for selecting a sensor."""
     return vol.Schema(
         {
-            vol.Required(CONF_INDEX): vol.In(
+            vol.Required(CONF_UNIQUE_ID): vol.In(
                 {
-                    str(index): config[CONF_NAME]
-                    for index, config in enumerate(handler.options[SENSOR_DOMAIN])
+                    config[CONF_UNIQUE_ID]: config[CONF_NAME]
+                    for config in handler.options[SENSOR_DOMAIN]
                 },
             )
         }
@@ -213,20 +430,23 @@ async def get_edit_sensor_suggested_values(
     handler: SchemaCommonFlowHandler,
 ) -> dict[str, Any]:
     """Return suggested values for sensor editing."""
-    idx: int = handler.flow_state["_idx"]
-    return cast(dict[str, Any], handler.options[SENSOR_DOMAIN][idx])
+    return get_sensor(handler, handler.flow_state["_unique_id"])
 
 
 async def validate_sensor_edit(
     handler: SchemaCommonFlowHandler, user_input: dict[str, Any]
 ) -> dict[str, Any]:
     """Update edited sensor."""
+    hass = async_get_hass()
+    await async_validate_multi_value(hass, user_input)
+    validate_processing(user_input)
+    await async_validate_selector(hass, user_input)
+    await async_preview_sensor(handler, user_input)
     user_input[CONF_INDEX] = int(user_input[CONF_INDEX])
 
     # Standard behavior is to merge the result with the options.
     # In this case, we want to add a sub-item so we update the options directly.
-    idx: int = handler.flow_state["_idx"]
-    handler.options[SENSOR_DOMAIN][idx].update(user_input)
+    get_sensor(handler, handler.flow_state["_unique_id"]).update(user_input)
     return {}
 
 
@@ -234,10 +454,10 @@ async def get_remove_sensor_schema(handler: SchemaCommonFlowHandler) -> vol.Sche
     """Return schema for sensor removal."""
     return vol.Schema(
         {
-            vol.Required(CONF_INDEX): cv.multi_select(
+            vol.Required(CONF_UNIQUE_ID): cv.multi_select(
                 {
-                    str(index): config[CONF_NAME]
-                    for index, config in enumerate(handler.options[SENSOR_DOMAIN])
+                    config[CONF_UNIQUE_ID]: config[CONF_NAME]
+                    for config in handler.options[SENSOR_DOMAIN]
                 },
             )
         }
@@ -248,23 +468,26 @@ async def validate_remove_sensor(
     handler: SchemaCommonFlowHandler, user_input: dict[str, Any]
 ) -> dict[str, Any]:
     """Validate remove sensor."""
-    removed_indexes: set[str] = set(user_input[CONF_INDEX])
+    removed_unique_ids: set[str] = set(user_input[CONF_UNIQUE_ID])
 
     # Standard behavior is to merge the result with the options.
     # In this case, we want to remove sub-items so we update the options directly.
     entity_registry = er.async_get(handler.parent_handler.hass)
     sensors: list[dict[str, Any]] = []
     sensor: dict[str, Any]
-    for index, sensor in enumerate(handler.options[SENSOR_DOMAIN]):
-        if str(index) not in removed_indexes:
+    for sensor in handler.options[SENSOR_DOMAIN]:
+        if sensor[CONF_UNIQUE_ID] not in removed_unique_ids:
             sensors.append(sensor)
-        elif entity_id := entity_registry.async_get_entity_id(
-            SENSOR_DOMAIN, DOMAIN, sensor[CONF_UNIQUE_ID]
-        ):
-            entity_registry.async_remove(entity_id)
-            # KGN Start
-            entity_registry.async_remove(f"binary_{entity_id}_updated")
-            # KGN end
+            continue
+
+        for item in resource_items(handler.options):
+            if entity_id := entity_registry.async_get_entity_id(
+                SENSOR_DOMAIN, DOMAIN, item_unique_id(sensor[CONF_UNIQUE_ID], item)
+            ):
+                entity_registry.async_remove(entity_id)
+                # KGN Start
+                entity_registry.async_remove(f"binary_{entity_id}_updated")
+                # KGN end
 
     handler.options[SENSOR_DOMAIN] = sensors
     return {}
@@ -14,6 +14,48 @@ PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR]
 CONF_CLEAR_UPDATED_BIN_SENSOR_AFTER = "clear_updated_bin_sensor_after"
 CONF_BS_SEARCH_TYPE = "search_type"
 CONF_NICKNAME = "nickname"
+CONF_PAGES = "pages"
+CONF_ITEMS = "items"
+CONF_PREVIEW = "preview"
+CONF_PREVIEW_VALUE = "preview_value"
+CONF_PARSE_IN_PROCESS = "parse_in_process"
+CONF_ACCEPT_ENCODING = "accept_encoding"
+CONF_EXTRA_ATTRIBUTES = "extra_attributes"
+CONF_MATCHES_LIMIT = "matches_limit"
+CONF_SUB_SELECTORS = "sub_selectors"
+CONF_STRIP = "strip"
+CONF_REGEX = "regex"
+CONF_NUMBER_FORMAT = "number_format"
+CONF_SCALE = "scale"
+CONF_DATE_FORMAT = "date_format"
+CONF_CONFIG_ENTRY_ID = "config_entry_id"
+CONF_SELECTORS = "selectors"
+CONF_ITEM = "item"
+CONF_MAX_AGE = "max_age"
+
+SERVICE_EXTRACT = "extract"
+
+NUMBER_FORMAT_DECIMAL_POINT = "decimal_point"
+NUMBER_FORMAT_DECIMAL_COMMA = "decimal_comma"
+NUMBER_FORMATS = [NUMBER_FORMAT_DECIMAL_POINT, NUMBER_FORMAT_DECIMAL_COMMA]
+
+ATTR_VALUES = "values"
+ATTR_RESULTS = "results"
+
+CONTENT_ENCODINGS = ["gzip", "deflate", "br", "zstd"]
+
+DEFAULT_PAGES = 1
+PAGE_PLACEHOLDER = "{page}"
+ITEM_PLACEHOLDER = "{item}"
+MAX_PARALLEL_FETCHES = 4
+PREVIEW_CACHE_TTL = 120
+PARSE_WORKERS = 2
+SIGNAL_ADD_SENSORS = "scrape_add_sensors_{}"
+RESPONSE_CACHE_MAX_SIZE = 32 * 1024 * 1024
+BREAKER_FAILURE_THRESHOLD = 3
+BACKOFF_INITIAL = 60
+BACKOFF_MAX = 6 * 3600
+INCREMENTAL_SPLIT_SIZE = 2048
 
 CONF_BS_SEARCH_SELECT = "select"
 CONF_BS_SEARCH_FIND = "find"
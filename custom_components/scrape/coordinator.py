@@ -1,23 +1,56 @@
 """Coordinator for the scrape component."""
 from __future__ import annotations
 
+import asyncio
+from collections import defaultdict
+from dataclasses import replace
 from datetime import datetime, timedelta
+from hashlib import blake2b
+from http import HTTPStatus
 import logging
+from time import monotonic
+from typing import Any
 
-from bs4 import BeautifulSoup
-
-from homeassistant.components.rest import RestData
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .breaker import async_get_circuit_breaker
+from .const import MAX_PARALLEL_FETCHES
+from .data import ScrapeRestData
+from .extract import ScrapeMatcher, ScrapeSelector
+from .parser import (
+    ScrapeResult,
+    async_add_parse_job,
+    merge_and_extract,
+    parse_and_extract,
+    parse_document,
+    update_and_extract,
+)
+
 _LOGGER = logging.getLogger(__name__)
 
 
-class ScrapeCoordinator(DataUpdateCoordinator[BeautifulSoup]):
-    """Scrape Coordinator."""
+class ScrapeCoordinator(DataUpdateCoordinator[dict[str, ScrapeResult]]):
+    """Scrape Coordinator.
+
+    The data holds the parsed document and the sensor values of every item
+    the resource fans out to. The values of all sensors are matched in one
+    traversal of the document.
+
+    Only digests of the pages are kept to detect unchanged pages. The texts
+    are kept as well when they are parsed in processes, the retained values
+    are extracted from them. Jobs reading or updating the kept document of
+    an item hold its lock.
+    """
 
     def __init__(
-        self, hass: HomeAssistant, rest: RestData, update_interval: timedelta
+        self,
+        hass: HomeAssistant,
+        rest_targets: dict[str, list[ScrapeRestData]],
+        update_interval: timedelta,
+        selectors: dict[str, ScrapeSelector],
+        parse_in_process: bool = False,
     ) -> None:
         """Initialize Scrape coordinator."""
         super().__init__(
@@ -26,7 +59,18 @@ class ScrapeCoordinator(DataUpdateCoordinator[BeautifulSoup]):
             name="Scrape Coordinator",
             update_interval=update_interval,
         )
-        self._rest = rest
+        self._rest_targets = rest_targets
+        self.matcher = ScrapeMatcher(selectors)
+        self._parse_in_process = parse_in_process
+        self._fetch_semaphore = asyncio.Semaphore(MAX_PARALLEL_FETCHES)
+        # Digests of the pages of every item and the result parsed from them
+        self._last_parsed: dict[str, tuple[list[bytes], ScrapeResult]] = {}
+        self._page_texts: dict[str, list[str]] = {}
+        self._item_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._refreshed_at: dict[str, float] = {}
+        # Options and validated sensors keyed by unique id, set for config entries
+        self.entry_options: dict[str, Any] = {}
+        self.sensor_configs: dict[str, ConfigType] = {}
         # KGN Start
         self.updated: dict[str, bool] = {}
         self.new_value: dict[str, str] = {}
@@ -34,12 +78,208 @@ class ScrapeCoordinator(DataUpdateCoordinator[BeautifulSoup]):
         self.updated_at: dict[str, datetime] = {}
         # KGN End
 
-    async def _async_update_data(self) -> BeautifulSoup:
+    @property
+    def items(self) -> list[str]:
+        """Return the items the resource fans out to."""
+        return list(self._rest_targets)
+
+    @property
+    def rest_targets(self) -> dict[str, list[ScrapeRestData]]:
+        """Return the pages of every item."""
+        return self._rest_targets
+
+    async def _async_fetch_page(self, rest: ScrapeRestData) -> str:
+        """Fetch one page unless the circuit of the resource is open."""
+        breaker = async_get_circuit_breaker(self.hass, rest.url)
+        if not breaker.allow_request():
+            raise UpdateFailed(
+                f"Requests to {rest.url} are paused for {breaker.retry_in:.0f} seconds"
+            )
+
+        interval: float = (
+            self.update_interval.total_seconds() if self.update_interval else 0
+        )
+        try:
+            async with self._fetch_semaphore:
+                await rest.async_update(log_errors=breaker.failures == 0)
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except Exception as ex:
+            breaker.record_failure(repr(ex), interval)
+            raise
+
+        if (data := rest.data) is None:
+            breaker.record_failure(repr(rest.last_exception), interval)
+            raise UpdateFailed("REST data is not available")
+
+        # The error pages of a failing server or its proxy are not the page
+        if (status := rest.status) is not None and (
+            status >= HTTPStatus.INTERNAL_SERVER_ERROR
+            or status == HTTPStatus.TOO_MANY_REQUESTS
+        ):
+            breaker.record_failure(f"HTTP status {status}", interval)
+            raise UpdateFailed(f"{rest.url} responded with HTTP status {status}")
+
+        breaker.record_success()
+        return data
+
+    async def _async_parse_target(
+        self, texts: list[str], previous: ScrapeResult | None
+    ) -> ScrapeResult:
+        """Parse the pages of one item and extract the sensor values.
+
+        The kept document of a single page is updated with the changed blocks.
+        """
+        if self._parse_in_process:
+            return await async_add_parse_job(
+                self.hass, True, parse_and_extract, texts, self.matcher
+            )
+
+        if len(texts) == 1:
+            return await async_add_parse_job(
+                self.hass, False, update_and_extract, texts[0], self.matcher, previous
+            )
+
+        soups = await asyncio.gather(
+            *(
+                async_add_parse_job(self.hass, False, parse_document, text)
+                for text in texts
+            )
+        )
+        return await async_add_parse_job(
+            self.hass, False, merge_and_extract, soups, self.matcher
+        )
+
+    async def _async_extract_retained(
+        self, item: str, matcher: ScrapeMatcher
+    ) -> ScrapeResult:
+        """Extract values from the retained pages of one item in one parse job."""
+        async with self._item_locks[item]:
+            if (soup := self.data[item].soup) is not None:
+                return await async_add_parse_job(
+                    self.hass, False, merge_and_extract, [soup], matcher
+                )
+        return await async_add_parse_job(
+            self.hass, True, parse_and_extract, self._page_texts[item], matcher
+        )
+
+    async def async_set_selectors(self, selectors: dict[str, ScrapeSelector]) -> None:
+        """Replace the selectors and extract the values without fetching."""
+        if selectors == self.matcher.selectors:
+            return
+
+        self.matcher = ScrapeMatcher(selectors)
+        if self.data is None:
+            return
+
+        results: list[ScrapeResult] = await asyncio.gather(
+            *(self._async_extract_retained(item, self.matcher) for item in self.data)
+        )
+        for item, result in zip(self.data, results):
+            previous = self.data[item]
+            # The document is the same, so are its blocks
+            if previous.blocks is not None:
+                result.blocks = replace(previous.blocks, selectors=dict(selectors))
+            last = self._last_parsed.get(item)
+            if last is not None and last[1] is previous:
+                self._last_parsed[item] = (last[0], result)
+        self.data = dict(zip(self.data, results))
+        self.async_update_listeners()
+
+    async def _async_refresh_item(self, item: str) -> None:
+        """Fetch the pages of one item again without updating the other items."""
+        try:
+            result = await self._async_fetch_target(item, self._rest_targets[item])
+        except UpdateFailed as err:
+            _LOGGER.debug("Item '%s' is not available: %s", item, err)
+            return
+
+        self._refreshed_at[item] = monotonic()
+        self.data = {**(self.data or {}), item: result}
+        self.async_update_listeners()
+
+    async def async_extract(
+        self,
+        item: str,
+        selectors: dict[str, ScrapeSelector],
+        max_age: float | None = None,
+    ) -> ScrapeResult | None:
+        """Extract values with other selectors from the current pages of an item.
+
+        The pages of the item are only fetched again when they are older than
+        max_age seconds, the update interval by default.
+        """
+        if max_age is None and self.update_interval is not None:
+            max_age = self.update_interval.total_seconds()
+
+        if (
+            self.data is None
+            or item not in self.data
+            or (
+                max_age is not None
+                and monotonic() - self._refreshed_at.get(item, 0) > max_age
+            )
+        ):
+            await self._async_refresh_item(item)
+            if self.data is None or item not in self.data:
+                return None
+
+        return await self._async_extract_retained(item, ScrapeMatcher(selectors))
+
+    async def _async_fetch_target(
+        self, item: str, rest_pages: list[ScrapeRestData]
+    ) -> ScrapeResult:
+        """Fetch all pages of one item, parse them and extract the sensor values.
+
+        When no page changed since the last refresh the previous document and
+        values are reused without parsing.
+        """
+        texts: list[str] = await asyncio.gather(
+            *(self._async_fetch_page(rest) for rest in rest_pages)
+        )
+        digests = [
+            blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+            for text in texts
+        ]
+
+        async with self._item_locks[item]:
+            if (last := self._last_parsed.get(item)) is not None and last[0] == digests:
+                _LOGGER.debug("Pages of item '%s' are unchanged", item)
+                return last[1]
+
+            # The previous document may be updated to the new pages
+            self._last_parsed.pop(item, None)
+            result = await self._async_parse_target(
+                texts, None if last is None else last[1]
+            )
+            self._last_parsed[item] = (digests, result)
+        if self._parse_in_process:
+            self._page_texts[item] = texts
+        return result
+
+    async def _async_update_data(self) -> dict[str, ScrapeResult]:
         """Fetch data from Rest."""
-        await self._rest.async_update()
+        results: list[ScrapeResult | BaseException] = await asyncio.gather(
+            *(
+                self._async_fetch_target(item, rest_pages)
+                for item, rest_pages in self._rest_targets.items()
+            ),
+            return_exceptions=True,
+        )
 
-        if (data := self._rest.data) is None:
+        data: dict[str, ScrapeResult] = {}
+        for item, result in zip(self._rest_targets, results):
+            if isinstance(result, UpdateFailed):
+                _LOGGER.debug("Item '%s' is not available: %s", item, result)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            data[item] = result
+            self._refreshed_at[item] = monotonic()
+
+        if not data:
             raise UpdateFailed("REST data is not available")
-        soup = await self.hass.async_add_executor_job(BeautifulSoup, data, "lxml")
-        _LOGGER.debug("Raw beautiful soup: %s", soup)
-        return soup
+
+        _LOGGER.debug("Scraped values: %s", data)
+        return data
@@ -0,0 +1,395 @@
+"""Data retrieval for the scrape component."""
+from __future__ import annotations
+
+import codecs
+from collections.abc import Callable, Hashable
+from functools import cache
+from importlib import import_module
+import logging
+import re
+import ssl
+from typing import cast
+
+import httpx
+
+from homeassistant.components.rest.const import (
+    CONF_SSL_CIPHER_LIST,
+    DEFAULT_SSL_CIPHER_LIST,
+)
+from homeassistant.components.rest.data import DEFAULT_TIMEOUT
+from homeassistant.const import (
+    CONF_AUTHENTICATION,
+    CONF_HEADERS,
+    CONF_METHOD,
+    CONF_PARAMS,
+    CONF_PASSWORD,
+    CONF_PAYLOAD,
+    CONF_RESOURCE,
+    CONF_RESOURCE_TEMPLATE,
+    CONF_TIMEOUT,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+    HTTP_DIGEST_AUTHENTICATION,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import template
+from homeassistant.helpers.httpx_client import create_async_httpx_client
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util.ssl import SSLCipherList
+
+from .cache import async_get_response_cache
+from .const import (
+    CONF_ACCEPT_ENCODING,
+    CONF_ENCODING,
+    CONTENT_ENCODINGS,
+    DEFAULT_ENCODING,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _compressor(encoding: str) -> Callable[[bytes], bytes] | None:
+    """Return the compress function of the optional library of the encoding."""
+    if encoding == "br":
+        for module in ("brotli", "brotlicffi"):
+            try:
+                return cast(Callable[[bytes], bytes], import_module(module).compress)
+            except ImportError:
+                continue
+    elif encoding == "zstd":
+        try:
+            return cast(
+                Callable[[bytes], bytes],
+                import_module("zstandard").ZstdCompressor().compress,
+            )
+        except ImportError:
+            pass
+    return None
+
+
+def _httpx_decodes(encoding: str) -> bool:
+    """Return True if httpx decompresses the content encoding.
+
+    gzip and deflate are always available. For br and zstd the library must
+    be installed and the installed httpx must use it, which is tested by
+    decompressing a sample.
+    """
+    if encoding in ("gzip", "deflate"):
+        return True
+    if (compress := _compressor(encoding)) is None:
+        return False
+
+    sample = b"scrape"
+    response = httpx.Response(
+        200, headers={"Content-Encoding": encoding}, content=compress(sample)
+    )
+    try:
+        return response.read() == sample
+    except httpx.DecodingError:
+        return False
+
+
+@cache
+def available_content_encodings() -> frozenset[str]:
+    """Return the content encodings httpx can decompress.
+
+    Detected on the first request instead of when scrape is loaded, as the
+    compression libraries are imported for it.
+    """
+    return frozenset(
+        encoding for encoding in CONTENT_ENCODINGS if _httpx_decodes(encoding)
+    )
+
+# Only the start of the document is searched for a meta charset declaration
+META_CHARSET_SCAN_BYTES = 2048
+META_CHARSET_RE = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE
+)
+
+
+def _lookup_encoding(encoding: str | None) -> str | None:
+    """Return the normalized codec name or None if the codec is unknown."""
+    if not encoding:
+        return None
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return None
+
+
+class ScrapeRestData:
+    """Class for handling the data retrieval of a scraped page.
+
+    The response is decoded by scrape itself. The encoding is decided once
+    per resource from the charset of the Content-Type header, the meta charset
+    of the document or the configured encoding, in that order, and reused
+    until the header charset changes.
+
+    The accepted content encodings are negotiated per resource. The body is
+    streamed, decompressed and decoded chunk by chunk, and the bytes on the
+    wire and the decompressed bytes are counted.
+
+    GET responses are kept in the shared response cache while their
+    Cache-Control or Expires headers say they are fresh, and are served from
+    there without a request.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        method: str,
+        resource: str,
+        encoding: str,
+        auth: httpx.DigestAuth | tuple[str, str] | None,
+        headers: dict[str, str] | None,
+        params: dict[str, str] | None,
+        data: str | None,
+        verify_ssl: bool,
+        ssl_cipher_list: str,
+        timeout: int = DEFAULT_TIMEOUT,
+        accept_encoding: list[str] | None = None,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        """Initialize the data object."""
+        self._hass = hass
+        self._method = method
+        self._resource = resource
+        self._encoding = encoding
+        self._auth = auth
+        self._headers = headers
+        self._params = params
+        self._request_data = data
+        self._timeout = timeout
+        self._verify_ssl = verify_ssl
+        self._ssl_cipher_list = SSLCipherList(ssl_cipher_list)
+        self._async_client: httpx.AsyncClient | None = client
+        self._header_charset: str | None = None
+        self._content_encodings: list[str] = accept_encoding or []
+        self._accept_encoding: str | None = None
+        self.wire_bytes: int = 0
+        self.decoded_bytes: int = 0
+        self.cache_hits: int = 0
+        self.encoding: str | None = None
+        self.data: str | None = None
+        self.last_exception: Exception | None = None
+        self.headers: httpx.Headers | None = None
+        # HTTP status of the response of the data, None without a response
+        self.status: int | None = None
+
+    @property
+    def url(self) -> str:
+        """Get url."""
+        return self._resource
+
+    def _decide_encoding(self, header_charset: str | None, content: bytes) -> str:
+        """Decide the encoding of the resource."""
+        if encoding := _lookup_encoding(header_charset):
+            return encoding
+
+        if match := META_CHARSET_RE.search(content[:META_CHARSET_SCAN_BYTES]):
+            if encoding := _lookup_encoding(match.group(1).decode("ascii")):
+                return encoding
+
+        return _lookup_encoding(self._encoding) or DEFAULT_ENCODING
+
+    def _get_decoder(
+        self, response: httpx.Response, head: bytes
+    ) -> codecs.IncrementalDecoder:
+        """Return a text decoder using the cached encoding decision."""
+        header_charset: str | None = response.charset_encoding
+
+        if self.encoding is None or header_charset != self._header_charset:
+            self._header_charset = header_charset
+            self.encoding = self._decide_encoding(header_charset, head)
+            _LOGGER.debug("Using encoding %s for %s", self.encoding, self._resource)
+
+        return codecs.getincrementaldecoder(self.encoding)(errors="replace")
+
+    async def _async_read_text(self, response: httpx.Response) -> str:
+        """Read, decompress and decode the streamed body."""
+        decoder: codecs.IncrementalDecoder | None = None
+        parts: list[str] = []
+        head = b""
+        decoded_bytes = 0
+
+        async for chunk in response.aiter_bytes():
+            decoded_bytes += len(chunk)
+            if decoder is not None:
+                parts.append(decoder.decode(chunk))
+                continue
+
+            # Keep the start of the body until a meta charset can be searched
+            head += chunk
+            if len(head) >= META_CHARSET_SCAN_BYTES:
+                decoder = self._get_decoder(response, head)
+                parts.append(decoder.decode(head))
+
+        if decoder is None:
+            decoder = self._get_decoder(response, head)
+            parts.append(decoder.decode(head))
+        parts.append(decoder.decode(b"", final=True))
+
+        self.wire_bytes += response.num_bytes_downloaded
+        self.decoded_bytes += decoded_bytes
+        _LOGGER.debug(
+            "Received %s bytes (%s decompressed) from %s",
+            response.num_bytes_downloaded,
+            decoded_bytes,
+            self._resource,
+        )
+        return "".join(parts)
+
+    async def async_update(self, log_errors: bool = True) -> None:
+        """Get the latest data from the resource with provided method."""
+        if not self._async_client:
+            self._async_client = create_async_httpx_client(
+                self._hass,
+                verify_ssl=self._verify_ssl,
+                ssl_cipher_list=self._ssl_cipher_list,
+            )
+
+        if self._accept_encoding is None:
+            self._accept_encoding = ", ".join(
+                encoding
+                for encoding in self._content_encodings
+                if encoding in available_content_encodings()
+            ) or "identity"
+        request_headers = httpx.Headers({"Accept-Encoding": self._accept_encoding})
+        # Headers from the configuration take precedence
+        request_headers.update(
+            template.render_complex(self._headers, parse_result=False)
+        )
+        rendered_params = template.render_complex(self._params)
+
+        cache = async_get_response_cache(self._hass)
+        cache_key: Hashable | None = None
+        if self._method == "GET" and self._request_data is None:
+            cache_key = (
+                self._resource,
+                tuple(sorted(request_headers.multi_items())),
+                repr(rendered_params),
+                id(self._auth)
+                if isinstance(self._auth, httpx.DigestAuth)
+                else self._auth,
+                self._encoding,
+            )
+            if (cached := cache.get(cache_key)) is not None:
+                _LOGGER.debug("Using cached response for %s", self._resource)
+                self.cache_hits += 1
+                self.data = cached.text
+                self.headers = cached.headers
+                self.status = cached.status
+                return
+
+        _LOGGER.debug("Updating from %s", self._resource)
+        try:
+            async with self._async_client.stream(
+                self._method,
+                self._resource,
+                headers=request_headers,
+                params=rendered_params,
+                auth=self._auth,
+                content=self._request_data,
+                timeout=self._timeout,
+                follow_redirects=True,
+            ) as response:
+                self.data = await self._async_read_text(response)
+                self.headers = response.headers
+                self.status = response.status_code
+            if cache_key is not None and response.is_success:
+                cache.set(cache_key, self.data, self.headers, self.status)
+        except httpx.TimeoutException as ex:
+            if log_errors:
+                _LOGGER.error("Timeout while fetching data: %s", self._resource)
+            self.last_exception = ex
+            self.data = None
+            self.headers = None
+            self.status = None
+        except httpx.RequestError as ex:
+            if log_errors:
+                _LOGGER.error(
+                    "Error fetching data: %s failed with %s", self._resource, ex
+                )
+            self.last_exception = ex
+            self.data = None
+            self.headers = None
+            self.status = None
+        except ssl.SSLError as ex:
+            if log_errors:
+                _LOGGER.error(
+                    "Error connecting to %s failed with %s", self._resource, ex
+                )
+            self.last_exception = ex
+            self.data = None
+            self.headers = None
+            self.status = None
+
+
+def create_scrape_client(hass: HomeAssistant, config: ConfigType) -> httpx.AsyncClient:
+    """Create a client for the pages of a resource.
+
+    The client is owned by scrape, its cookies are not shared with other
+    entries or integrations.
+    """
+    return create_async_httpx_client(
+        hass,
+        verify_ssl=config[CONF_VERIFY_SSL],
+        ssl_cipher_list=SSLCipherList(
+            config.get(CONF_SSL_CIPHER_LIST, DEFAULT_SSL_CIPHER_LIST)
+        ),
+    )
+
+
+def create_scrape_rest_data(
+    hass: HomeAssistant, config: ConfigType, client: httpx.AsyncClient | None = None
+) -> ScrapeRestData:
+    """Create ScrapeRestData from config.
+
+    Without a client the data object creates its own.
+    """
+    resource: str | None = config.get(CONF_RESOURCE)
+    resource_template: template.Template | None = config.get(CONF_RESOURCE_TEMPLATE)
+    method: str = config[CONF_METHOD]
+    payload: str | None = config.get(CONF_PAYLOAD)
+    verify_ssl: bool = config[CONF_VERIFY_SSL]
+    ssl_cipher_list: str = config.get(CONF_SSL_CIPHER_LIST, DEFAULT_SSL_CIPHER_LIST)
+    username: str | None = config.get(CONF_USERNAME)
+    password: str | None = config.get(CONF_PASSWORD)
+    headers: dict[str, str] | None = config.get(CONF_HEADERS)
+    params: dict[str, str] | None = config.get(CONF_PARAMS)
+    timeout: int = config[CONF_TIMEOUT]
+    encoding: str = config.get(CONF_ENCODING, DEFAULT_ENCODING)
+    accept_encoding: list[str] = config.get(CONF_ACCEPT_ENCODING, CONTENT_ENCODINGS)
+    if resource_template is not None:
+        resource_template.hass = hass
+        resource = resource_template.async_render(parse_result=False)
+
+    if not resource:
+        raise HomeAssistantError("Resource not set for ScrapeRestData")
+
+    template.attach(hass, headers)
+    template.attach(hass, params)
+
+    auth: httpx.DigestAuth | tuple[str, str] | None = None
+    if username and password:
+        if config.get(CONF_AUTHENTICATION) == HTTP_DIGEST_AUTHENTICATION:
+            auth = httpx.DigestAuth(username, password)
+        else:
+            auth = (username, password)
+
+    return ScrapeRestData(
+        hass,
+        method,
+        resource,
+        encoding,
+        auth,
+        headers,
+        params,
+        payload,
+        verify_ssl,
+        ssl_cipher_list,
+        timeout,
+        accept_encoding,
+        client,
+    )
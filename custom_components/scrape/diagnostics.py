@@ -0,0 +1,48 @@
+"""Diagnostics support for Scrape."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HEADERS, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .breaker import async_get_circuit_breaker
+from .const import DOMAIN
+from .coordinator import ScrapeCoordinator
+
+TO_REDACT = {CONF_HEADERS, CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: ScrapeCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    resources: list[dict[str, Any]] = []
+    for item, rest_pages in coordinator.rest_targets.items():
+        for rest in rest_pages:
+            breaker = async_get_circuit_breaker(hass, rest.url)
+            resources.append(
+                {
+                    "item": item,
+                    "resource": rest.url,
+                    "circuit": breaker.state,
+                    "failures": breaker.failures,
+                    "backoff": breaker.backoff,
+                    "retry_in": round(breaker.retry_in),
+                    "last_error": breaker.last_error,
+                    "encoding": rest.encoding,
+                    "wire_bytes": rest.wire_bytes,
+                    "decoded_bytes": rest.decoded_bytes,
+                    "cache_hits": rest.cache_hits,
+                }
+            )
+
+    return {
+        "config_entry": async_redact_data(config_entry.as_dict(), TO_REDACT),
+        "last_update_success": coordinator.last_update_success,
+        "resources": resources,
+    }
@@ -0,0 +1,530 @@
+"""Extraction of values from scraped documents."""
+from __future__ import annotations
+
+from collections.abc import Collection, Iterable, Mapping
+from dataclasses import dataclass
+import logging
+import re
+from typing import TYPE_CHECKING, Any, cast
+
+from homeassistant.const import CONF_ATTRIBUTE
+
+from .const import (
+    ATTR_VALUES,
+    CONF_BS_SEARCH_FIND,
+    CONF_BS_SEARCH_FIND_STRING,
+    CONF_BS_SEARCH_SELECT,
+    CONF_BS_SEARCH_TYPE,
+    CONF_EXTRA_ATTRIBUTES,
+    CONF_INDEX,
+    CONF_MATCHES_LIMIT,
+    CONF_SELECT,
+    CONF_SUB_SELECTORS,
+)
+from .processing import ScrapeProcessor
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, PageElement, Tag
+    from soupsieve import SoupSieve
+
+_LOGGER = logging.getLogger(__name__)
+
+# Tag names that can also be written as a CSS type selector
+TAG_NAME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9-]*$")
+
+# Group numbers shift when patterns are combined, so backreferences break
+BACKREFERENCE_RE = re.compile(r"\\[1-9]|\(\?P=")
+
+# Sibling combinators and pseudo classes other than the ones depending on the
+# tag, its attributes or its content can match a tag differently when other
+# parts of the document change
+CONTEXT_RE = re.compile(
+    r"[+~]|:(?!(?:not|is|where|matches|any|has|contains|-soup-contains"
+    r"|-soup-contains-own|empty|root|checked|disabled|enabled|required|optional"
+    r"|link|any-link)(?![-\w]))"
+)
+
+
+@dataclass(frozen=True)
+class ScrapeSelector:
+    """Describe where the value of a sensor is found in the document."""
+
+    search_type: str
+    select: str
+    attribute: str | None = None
+    index: int = 0
+    # KGN start
+    extra_attributes: tuple[str, ...] = ()
+    matches_limit: int = 0
+    sub_selectors: tuple[tuple[str, str], ...] = ()
+    processor: ScrapeProcessor = ScrapeProcessor()
+    # KGN end
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> ScrapeSelector:
+        """Create the selector from a sensor config."""
+        return cls(
+            config.get(CONF_BS_SEARCH_TYPE, CONF_BS_SEARCH_SELECT),
+            config[CONF_SELECT],
+            config.get(CONF_ATTRIBUTE),
+            int(config.get(CONF_INDEX, 0)),
+            # KGN start
+            tuple(config.get(CONF_EXTRA_ATTRIBUTES) or ()),
+            int(config.get(CONF_MATCHES_LIMIT) or 0),
+            tuple((config.get(CONF_SUB_SELECTORS) or {}).items()),
+            ScrapeProcessor.from_config(config),
+            # KGN end
+        )
+
+    @property
+    def has_attributes(self) -> bool:
+        """Return True if the selector extracts state attributes."""
+        return bool(self.extra_attributes or self.matches_limit or self.sub_selectors)
+
+    def find_matches(self, soup: BeautifulSoup) -> list[Any]:
+        """Return all matches in the document."""
+        # KGN start
+        if self.search_type == CONF_BS_SEARCH_SELECT:
+            # KGN end
+            return soup.select(self.select)
+
+        # KGN start
+        if self.search_type == CONF_BS_SEARCH_FIND:
+            return soup.find_all(self.select)
+
+        return soup.find_all(string=re.compile(self.select))
+        # KGN end
+
+    def extract(self, soup: BeautifulSoup) -> Any:
+        """Extract the value from the document."""
+        # KGN start
+        if self.search_type == CONF_BS_SEARCH_SELECT:
+            # KGN end
+            return self.value_from_matches(self.find_matches(soup))
+
+        # KGN start
+        try:
+            matches = self.find_matches(soup)
+
+        except Exception:
+            _LOGGER.exception("BS find exception")
+            return None
+        # KGN end
+
+        return self.value_from_matches(matches)
+
+    def value_from_matches(self, matches: list[Any]) -> Any:
+        """Return the value of the indexed match."""
+        value: Any = ""
+
+        # KGN start
+        if self.search_type == CONF_BS_SEARCH_SELECT:
+            # KGN end
+            try:
+                if self.attribute is not None:
+                    value = matches[self.index][self.attribute]
+                else:
+                    tag = matches[self.index]
+                    if tag.name in ("style", "script", "template"):
+                        value = tag.string
+                    else:
+                        value = tag.text
+            except IndexError:
+                _LOGGER.warning(
+                    "Index '%s' not found for '%s'", self.index, self.select
+                )
+                value = None
+            except KeyError:
+                _LOGGER.warning(
+                    "Attribute '%s' not found for '%s'", self.attribute, self.select
+                )
+                value = None
+
+        # KGN start
+        else:
+            try:
+                value = matches[self.index].string
+
+            except AttributeError:
+                value = None
+
+            except Exception:
+                _LOGGER.exception("BS find exception")
+                value = None
+        # KGN end
+
+        _LOGGER.debug("Parsed value: %s", value)
+        return value
+
+    # KGN start
+    def _match_value(self, match: Any) -> Any:
+        """Return the value of one match, like the value of the sensor."""
+        if self.search_type != CONF_BS_SEARCH_SELECT:
+            return match.string
+        if self.attribute is not None:
+            return match.get(self.attribute)
+        if match.name in ("style", "script", "template"):
+            return match.string
+        return match.text
+
+    def attributes_from_matches(self, matches: list[Any]) -> dict[str, Any]:
+        """Return the state attributes extracted from the matches.
+
+        The values of all matches up to the limit, and the tag attributes and
+        sub selectors of the indexed match. For find_string the tag holding
+        the matched text is used.
+        """
+        attributes: dict[str, Any] = {}
+
+        if self.matches_limit:
+            attributes[ATTR_VALUES] = [
+                self.processor.process(plain_value(self._match_value(match)))
+                for match in matches[: self.matches_limit]
+            ]
+
+        if self.index >= len(matches):
+            return attributes
+
+        tag = matches[self.index]
+        if self.search_type == CONF_BS_SEARCH_FIND_STRING:
+            tag = tag.parent
+
+        for name in self.extra_attributes:
+            attributes[name] = tag.get(name)
+
+        for name, select in self.sub_selectors:
+            try:
+                sub_tag = tag.select_one(select)
+            except Exception as err:
+                _LOGGER.warning("Could not match sub selector '%s': %s", select, err)
+                sub_tag = None
+            attributes[name] = sub_tag.text if sub_tag is not None else None
+
+        return attributes
+
+    # KGN end
+
+
+def selectors_compile(selects: Iterable[str]) -> bool:
+    """Return True if all CSS selectors compile.
+
+    Runs in a parse worker, so soupsieve is only imported there.
+    """
+    import soupsieve
+
+    try:
+        for select in selects:
+            soupsieve.compile(select)
+    except soupsieve.SelectorSyntaxError:
+        return False
+    return True
+
+
+def plain_value(value: Any) -> Any:
+    """Return the value as a plain str or list.
+
+    Text nodes and attribute lists of bs4 would keep the document alive and
+    need bs4 to be unpickled.
+    """
+    if isinstance(value, str):
+        return str(value)
+    if isinstance(value, list):
+        return [plain_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: plain_value(item) for key, item in value.items()}
+    return value
+
+
+class ScrapeMatcher:
+    """Match the selectors of all sensors of a resource in one traversal.
+
+    The CSS selectors and the tag names of the find selectors are combined
+    into one selector list. The document is walked once in document order and
+    every matching tag is handed to the selectors it matches, until each
+    selector has reached its index. Sensors using the same selector with
+    another index share the matches.
+
+    The find_string patterns are matched in one walk over the text nodes. A
+    combined alternation of all patterns skips the text nodes none of them
+    matches. Selectors that can not be combined are matched one by one.
+    """
+
+    def __init__(self, selectors: dict[str, ScrapeSelector]) -> None:
+        """Initialize the matcher, the selectors are compiled on first use."""
+        self.selectors = selectors
+        self._groups: dict[str, tuple[str, str]] | None = None
+        self._compiled: dict[tuple[str, str], SoupSieve | None] = {}
+        self._patterns: dict[tuple[str, str], re.Pattern[str]] = {}
+        self._needed: dict[tuple[str, str], int] = {}
+        self._combined: SoupSieve | None = None
+        self._combined_pattern: re.Pattern[str] | None = None
+        self._contextual: set[tuple[str, str]] = set()
+
+    def _compile(self) -> None:
+        """Compile the selectors.
+
+        Runs in a parse worker, so soupsieve is only imported there. Workers
+        compiling at the same time build and assign the same result.
+        """
+        import soupsieve
+
+        groups: dict[str, tuple[str, str]] = {}
+        compiled: dict[tuple[str, str], SoupSieve | None] = {}
+        patterns: dict[tuple[str, str], re.Pattern[str]] = {}
+        needed: dict[tuple[str, str], int] = {}
+        combined: SoupSieve | None = None
+        combined_pattern: re.Pattern[str] | None = None
+
+        for key, selector in self.selectors.items():
+            if selector.index < 0:
+                continue
+            group = (selector.search_type, selector.select)
+            search_type, select = group
+
+            if group not in needed:
+                try:
+                    if search_type == CONF_BS_SEARCH_SELECT:
+                        compiled[group] = soupsieve.compile(select)
+                    elif search_type == CONF_BS_SEARCH_FIND and TAG_NAME_RE.match(
+                        select
+                    ):
+                        # Matched on the tag name, the type selector finds candidates
+                        compiled[group] = None
+                    elif search_type == CONF_BS_SEARCH_FIND_STRING:
+                        patterns[group] = re.compile(select)
+                    else:
+                        continue
+                except (soupsieve.SelectorSyntaxError, re.error):
+                    continue
+
+            groups[key] = group
+            needed[group] = max(
+                needed.get(group, 0), selector.index + 1, selector.matches_limit
+            )
+
+        if compiled:
+            combined = self._combine(compiled)
+            if combined is None:
+                # Matched one by one with find_matches
+                groups = {
+                    key: group for key, group in groups.items() if group not in compiled
+                }
+                compiled = {}
+
+        if len(patterns) > 1 and not any(
+            BACKREFERENCE_RE.search(pattern) for _, pattern in patterns
+        ):
+            try:
+                combined_pattern = re.compile(
+                    "|".join(f"(?:{pattern})" for _, pattern in patterns)
+                )
+            except re.error:
+                # Inline flags are only allowed at the start of a pattern
+                _LOGGER.debug("The find_string patterns can not be combined")
+
+        self._compiled = compiled
+        self._patterns = patterns
+        self._needed = needed
+        self._combined = combined
+        self._combined_pattern = combined_pattern
+        self._contextual = {
+            group
+            for group in compiled
+            if group[0] == CONF_BS_SEARCH_SELECT and CONTEXT_RE.search(group[1])
+        }
+        # The matcher is compiled once the groups are set
+        self._groups = groups
+
+    @staticmethod
+    def _combine(compiled: dict[tuple[str, str], SoupSieve | None]) -> SoupSieve | None:
+        """Combine the selectors into one selector list.
+
+        A selector ending in an escape would escape the separator and swallow
+        the next selector, so the combined list must hold exactly the
+        selectors of every group.
+        """
+        import soupsieve
+
+        try:
+            combined = soupsieve.compile(", ".join(select for _, select in compiled))
+        except soupsieve.SelectorSyntaxError:
+            combined = None
+
+        expected = sum(
+            1 if sieve is None else len(sieve.selectors) for sieve in compiled.values()
+        )
+        if combined is None or len(combined.selectors) != expected:
+            _LOGGER.debug("The CSS selectors can not be combined")
+            return None
+        return combined
+
+    def _matches(self, group: tuple[str, str], tag: Tag) -> bool:
+        """Return True if the tag matches the selector."""
+        if (compiled := self._compiled[group]) is None:
+            return tag.name == group[1]
+        return compiled.match(tag)
+
+    def _match_tags(
+        self, soup: BeautifulSoup, matches: dict[tuple[str, str], list[Any]]
+    ) -> None:
+        """Collect the matching tags of the selectors in one traversal."""
+        if self._combined is None:
+            return
+
+        pending = {
+            group: self._needed[group] for group in self._compiled if group in matches
+        }
+        if not pending:
+            return
+
+        combined = self._combined
+        if len(pending) < len(self._compiled):
+            # Fewer selectors are tried on every tag of the document
+            combined = (
+                self._combine({group: self._compiled[group] for group in pending})
+                or combined
+            )
+        for tag in combined.iselect(soup):
+            for group in [group for group in pending if self._matches(group, tag)]:
+                matches[group].append(tag)
+                if len(matches[group]) == pending[group]:
+                    del pending[group]
+            if not pending:
+                break
+
+    def _match_strings(
+        self, soup: BeautifulSoup, matches: dict[tuple[str, str], list[Any]]
+    ) -> None:
+        """Collect the matching text nodes of the patterns in one traversal."""
+        pending = {
+            group: self._needed[group] for group in self._patterns if group in matches
+        }
+        if not pending:
+            return
+
+        from bs4 import NavigableString
+
+        for node in soup.descendants:
+            if not isinstance(node, NavigableString):
+                continue
+            if (
+                self._combined_pattern is not None
+                and self._combined_pattern.search(node) is None
+            ):
+                continue
+            for group in [
+                group for group in pending if self._patterns[group].search(node)
+            ]:
+                matches[group].append(node)
+                if len(matches[group]) == pending[group]:
+                    del pending[group]
+            if not pending:
+                break
+
+    def extract(
+        self, soup: BeautifulSoup, keys: Collection[str] | None = None
+    ) -> tuple[dict[str, Any], dict[str, dict[str, Any]]]:
+        """Extract the values and state attributes of the selectors.
+
+        Only the selectors of the given keys are matched, all by default.
+        """
+        if self._groups is None:
+            self._compile()
+        groups = cast(dict[str, tuple[str, str]], self._groups)
+
+        selectors: dict[str, ScrapeSelector] = (
+            self.selectors
+            if keys is None
+            else {key: self.selectors[key] for key in keys if key in self.selectors}
+        )
+        matches: dict[tuple[str, str], list[Any]] = {
+            group: [] for key in selectors if (group := groups.get(key)) is not None
+        }
+        self._match_tags(soup, matches)
+        self._match_strings(soup, matches)
+
+        values: dict[str, Any] = {}
+        attributes: dict[str, dict[str, Any]] = {}
+        for key, selector in selectors.items():
+            try:
+                if (group := groups.get(key)) is not None:
+                    found = matches[group]
+                else:
+                    found = selector.find_matches(soup)
+                values[key] = selector.processor.process(
+                    plain_value(selector.value_from_matches(found))
+                )
+            except Exception:
+                _LOGGER.exception("Could not match '%s'", selector.select)
+                values[key] = None
+                continue
+
+            if not selector.has_attributes:
+                continue
+            try:
+                attributes[key] = plain_value(selector.attributes_from_matches(found))
+            except Exception:
+                _LOGGER.exception(
+                    "Could not extract attributes of '%s'", selector.select
+                )
+
+        return values, attributes
+
+    def affected_keys(
+        self, changed: Iterable[PageElement], ancestors: Iterable[Tag]
+    ) -> set[str]:
+        """Return the keys of the selectors whose values may have changed.
+
+        The changed nodes were removed from or inserted into the document with
+        all their descendants, the ancestors hold changed nodes. Selectors
+        depending on siblings or content, find_string selectors with
+        attributes of the parent tag and selectors matched one by one are
+        always affected.
+        """
+        if self._groups is None:
+            self._compile()
+        groups = cast(dict[str, tuple[str, str]], self._groups)
+
+        from bs4 import NavigableString, Tag
+
+        hit: set[tuple[str, str]] = set(self._contextual)
+        tag_groups = [group for group in self._compiled if group not in hit]
+
+        def match_tag(tag: Tag) -> None:
+            if not tag_groups or (
+                self._combined is not None and not self._combined.match(tag)
+            ):
+                return
+            for group in [group for group in tag_groups if self._matches(group, tag)]:
+                hit.add(group)
+                tag_groups.remove(group)
+
+        for ancestor in ancestors:
+            match_tag(ancestor)
+
+        string_groups = list(self._patterns)
+        for node in changed:
+            for descendant in (
+                [node, *node.descendants] if isinstance(node, Tag) else [node]
+            ):
+                if isinstance(descendant, Tag):
+                    match_tag(descendant)
+                elif string_groups and isinstance(descendant, NavigableString):
+                    for group in [
+                        group
+                        for group in string_groups
+                        if self._patterns[group].search(descendant)
+                    ]:
+                        hit.add(group)
+                        string_groups.remove(group)
+
+        return {
+            key
+            for key, selector in self.selectors.items()
+            if (group := groups.get(key)) is None
+            or group in hit
+            or (
+                selector.search_type == CONF_BS_SEARCH_FIND_STRING
+                and selector.has_attributes
+            )
+        }
@@ -0,0 +1,570 @@
+"""Incremental parsing of changed pages for the scrape component.
+
+The source of a page is split into blocks without parsing it: the text runs,
+comments and elements of the document, and inside every element of at least
+INCREMENTAL_SPLIT_SIZE characters the blocks of its content. After a full
+parse the blocks are mapped to the nodes of the document. Only a digest of
+the source and the number of nodes of every block are kept, the nodes are
+the children of the element in order.
+
+When the page changes, the blocks of the new source are compared with the
+kept digests level by level. An element whose start tag is unchanged is
+compared by its content, every other changed block is parsed again inside
+the start tags of its ancestors and spliced into the kept document in place
+of the old nodes. A block parsed on its own gives the same nodes as in the
+full document because blocks only end where the parser is back at the level
+of the container. Every split and every re-parse is checked against the
+nodes the parser created, and the page is parsed in full when they differ.
+"""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from hashlib import blake2b
+from itertools import accumulate
+import re
+from typing import TYPE_CHECKING, NamedTuple
+
+from .const import INCREMENTAL_SPLIT_SIZE
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, PageElement, Tag
+
+    from .extract import ScrapeSelector
+
+DIGEST_SIZE = 16
+
+KIND_TEXT = "#text"
+KIND_COMMENT = "#comment"
+KIND_DECLARATION = "#declaration"
+
+# Comment separating the blocks parsed together
+SEPARATOR = "scrape-incremental-block"
+
+TOKEN_RE = re.compile(
+    r"<!--.*?-->"
+    r"|<[!?][^>]*>"
+    r"|</([a-zA-Z][^\s/>]*)[^>]*>"
+    r"|<([a-zA-Z][^\s/>]*)(?:[^>\"']|\"[^\"]*\"|'[^']*')*?(/?)>",
+    re.DOTALL,
+)
+RAW_TEXT_END_RE = {
+    name: re.compile(rf"</{name}\s*>", re.IGNORECASE) for name in ("script", "style")
+}
+VOID_ELEMENTS = frozenset(
+    (
+        "area",
+        "base",
+        "basefont",
+        "br",
+        "col",
+        "embed",
+        "frame",
+        "hr",
+        "img",
+        "input",
+        "isindex",
+        "link",
+        "meta",
+        "param",
+        "source",
+        "track",
+        "wbr",
+    )
+)
+# Open elements the parser of libxml2 closes when a start tag follows them,
+# an HTML 4 table where e.g. <section> does not close <p> but <td> closes <b>
+IMPLIED_END: dict[str, frozenset[str]] = {
+    name: frozenset(closed.split())
+    for name, closed in (
+        ("a", "a"),
+        ("address", "p ul"),
+        ("blockquote", "p"),
+        ("caption", "p"),
+        ("center", "b font i p"),
+        ("col", "caption p"),
+        ("colgroup", "caption colgroup p"),
+        ("dd", "address dir dt listing menu p pre"),
+        ("dir", "p"),
+        ("div", "p"),
+        ("dl", "address dir dt listing menu p pre"),
+        ("dt", "address dd dir listing menu p pre"),
+        ("fieldset", "a h1 h2 h3 h4 h5 h6 legend listing p pre"),
+        ("form", "address dir dl form h1 h2 h3 h4 h5 h6 listing menu ol p pre ul"),
+        ("h1", "p"),
+        ("h2", "p"),
+        ("h3", "p"),
+        ("h4", "p"),
+        ("h5", "p"),
+        ("h6", "p"),
+        ("hr", "p"),
+        ("li", "address dl h1 h2 h3 h4 h5 h6 li listing p pre"),
+        ("listing", "p"),
+        ("menu", "p ul"),
+        ("ol", "p"),
+        ("optgroup", "option"),
+        ("option", "option"),
+        ("p", "b big h1 h2 h3 h4 h5 h6 i p s small strike tt u"),
+        ("pre", "p ul"),
+        ("table", "a h1 h2 h3 h4 h5 h6 listing p pre"),
+        ("tbody", "caption colgroup p tbody td tfoot th thead tr"),
+        ("td", "a b font i p span td th u"),
+        ("tfoot", "caption colgroup p tbody td th thead tr"),
+        ("th", "a b font i p span td th u"),
+        ("thead", "caption colgroup"),
+        ("tr", "caption colgroup p td th tr"),
+        ("ul", "address dir listing menu p pre"),
+        ("xmp", "p"),
+    )
+}
+# End tags do not close open elements of a higher priority
+END_PRIORITY = {
+    "div": 150,
+    "td": 160,
+    "th": 160,
+    "tr": 170,
+    "thead": 180,
+    "tbody": 180,
+    "tfoot": 180,
+    "table": 190,
+    "head": 200,
+    "body": 200,
+    "html": 220,
+}
+DEFAULT_END_PRIORITY = 100
+# Elements the parser creates once, their end tags only close them after
+# all elements in them
+DOCUMENT_ELEMENTS = frozenset(("html", "head", "body"))
+
+
+class Block(NamedTuple):
+    """A text run, comment or element in the source of a page.
+
+    The children are the blocks of the content of large elements closed by
+    their own end tag.
+    """
+
+    kind: str
+    start: int
+    end: int
+    start_tag_end: int
+    children: list[Block] | None
+
+
+@dataclass(slots=True)
+class KeptBlocks:
+    """The blocks of the content of the document or of an element.
+
+    The digests of the blocks are joined, the counts hold the number of nodes
+    of every block. Large elements keep their start tag and the blocks of
+    their content by the index of their block.
+    """
+
+    digests: bytes
+    counts: array[int]
+    elements: dict[int, tuple[str, KeptBlocks]]
+
+
+@dataclass
+class DocumentBlocks:
+    """The blocks of a parsed document and the selectors of its values."""
+
+    blocks: KeptBlocks
+    selectors: dict[str, ScrapeSelector]
+
+
+@dataclass
+class Splice:
+    """The old nodes of one container replaced by nodes parsed again.
+
+    An action of None keeps the nodes of a block, False removes them and
+    True inserts them.
+    """
+
+    container: Tag | BeautifulSoup
+    actions: list[tuple[bool | None, list[PageElement]]]
+
+    @property
+    def removed(self) -> list[PageElement]:
+        """Return the nodes the splice removes."""
+        return [
+            node for action, nodes in self.actions if action is False for node in nodes
+        ]
+
+    @property
+    def inserted(self) -> list[PageElement]:
+        """Return the nodes the splice inserts."""
+        return [node for action, nodes in self.actions if action for node in nodes]
+
+
+@dataclass
+class SplicePlan:
+    """All changes of a page, checked before the document is modified."""
+
+    splices: list[Splice] = field(default_factory=list)
+    ancestors: list[Tag] = field(default_factory=list)
+
+
+class _Frame(NamedTuple):
+    """An open element while scanning."""
+
+    name: str
+    start: int
+    start_tag_end: int
+    blocks: list[Block]
+
+
+def digest(text: str, start: int, end: int) -> bytes:
+    """Return the digest of a block of the source."""
+    return blake2b(
+        text[start:end].encode("utf-8", "surrogatepass"), digest_size=DIGEST_SIZE
+    ).digest()
+
+
+def scan_blocks(text: str) -> list[Block] | None:
+    """Split the source of a page into blocks.
+
+    Returns None for sources with markup the split can not follow.
+    """
+    root: list[Block] = []
+    stack: list[_Frame] = []
+    blocks = root
+    seen: set[str] = set()
+    text_start = 0
+    pos = 0
+    end = len(text)
+
+    def close(frame: _Frame, at: int, content_end: int | None) -> None:
+        """Add the element to the blocks of its parent."""
+        nonlocal blocks, text_start
+        if content_end is not None:
+            if text_start < content_end:
+                frame.blocks.append(
+                    Block(KIND_TEXT, text_start, content_end, text_start, None)
+                )
+            large = content_end - frame.start_tag_end >= INCREMENTAL_SPLIT_SIZE
+        else:
+            large = False
+        blocks = stack[-1].blocks if stack else root
+        blocks.append(
+            Block(
+                frame.name,
+                frame.start,
+                at,
+                frame.start_tag_end,
+                frame.blocks if large else None,
+            )
+        )
+        text_start = at
+
+    while (match := TOKEN_RE.search(text, pos)) is not None:
+        token_start = match.start()
+        pos = match.end()
+        end_name, start_name, self_closing = match.group(1, 2, 3)
+
+        if end_name is None and start_name is None:
+            if not match.group(0).startswith("<!--"):
+                kind = KIND_DECLARATION
+                if stack or text.startswith("<?", token_start):
+                    return None
+            else:
+                kind = KIND_COMMENT
+            if text_start < token_start:
+                blocks.append(
+                    Block(KIND_TEXT, text_start, token_start, text_start, None)
+                )
+            blocks.append(Block(kind, token_start, pos, pos, None))
+            text_start = pos
+            continue
+
+        if start_name is not None:
+            name = start_name.lower()
+            if name in DOCUMENT_ELEMENTS:
+                # Attributes of repeated start tags are merged into the element
+                if name in seen:
+                    return None
+                seen.add(name)
+            closes = IMPLIED_END.get(name)
+            while closes and stack and stack[-1].name in closes:
+                close(stack.pop(), token_start, None)
+
+            if text_start < token_start:
+                blocks.append(
+                    Block(KIND_TEXT, text_start, token_start, text_start, None)
+                )
+            text_start = token_start
+
+            if self_closing or name in VOID_ELEMENTS:
+                blocks.append(Block(name, token_start, pos, pos, None))
+                text_start = pos
+            elif name in RAW_TEXT_END_RE:
+                if (raw_end := RAW_TEXT_END_RE[name].search(text, pos)) is None:
+                    return None
+                blocks.append(Block(name, token_start, raw_end.end(), pos, None))
+                pos = text_start = raw_end.end()
+            else:
+                stack.append(_Frame(name, token_start, pos, []))
+                blocks = stack[-1].blocks
+                text_start = pos
+            continue
+
+        # An end tag closes the open element with its name and the elements
+        # opened after it, a stray end tag is ignored like by the parser
+        name = end_name.lower()
+        if name in DOCUMENT_ELEMENTS:
+            if not stack or stack[-1].name != name:
+                # The parser keeps the end for later, which changes how the
+                # rest of the page is parsed
+                return None
+        priority = END_PRIORITY.get(name, DEFAULT_END_PRIORITY)
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index].name == name:
+                break
+            if END_PRIORITY.get(stack[index].name, DEFAULT_END_PRIORITY) > priority:
+                index = -1
+                break
+        else:
+            continue
+        if index < 0:
+            continue
+        while len(stack) > index + 1:
+            close(stack.pop(), token_start, None)
+        close(stack.pop(), pos, token_start)
+
+    # The end of the document closes the open elements after their content
+    while stack:
+        close(stack.pop(), end, end)
+    if text_start < end:
+        root.append(Block(KIND_TEXT, text_start, end, text_start, None))
+    return root
+
+
+def node_kind(node: PageElement) -> str:
+    """Return the kind of block a node of the document belongs to."""
+    from bs4.element import Comment, PreformattedString, Tag
+
+    if isinstance(node, Tag):
+        return node.name
+    if isinstance(node, Comment):
+        return KIND_COMMENT
+    if isinstance(node, PreformattedString):
+        return KIND_DECLARATION
+    return KIND_TEXT
+
+
+def nodes_match(block: Block, nodes: list[PageElement]) -> bool:
+    """Return True if the nodes are the ones the block gives."""
+    if block.kind == KIND_TEXT:
+        return all(node_kind(node) == KIND_TEXT for node in nodes)
+    return len(nodes) == 1 and node_kind(nodes[0]) == block.kind
+
+
+def map_element(text: str, block: Block, element: Tag) -> tuple[str, KeptBlocks] | None:
+    """Return the start tag and the kept blocks of the content of an element."""
+    if block.children is None:
+        return None
+    if (children := map_blocks(text, element, block.children)) is None:
+        # Changes of the element are parsed with all its content
+        return None
+    return text[block.start : block.start_tag_end], children
+
+
+def map_blocks(
+    text: str, container: Tag | BeautifulSoup, blocks: list[Block]
+) -> KeptBlocks | None:
+    """Map the blocks to the children of the container.
+
+    Returns None when the parser created other nodes than the blocks give.
+    """
+    contents = container.contents
+    count = len(contents)
+    index = 0
+    counts = array("I")
+    elements: dict[int, tuple[str, KeptBlocks]] = {}
+
+    for position, block in enumerate(blocks):
+        start = index
+        if block.kind == KIND_TEXT:
+            while index < count and node_kind(contents[index]) == KIND_TEXT:
+                index += 1
+        elif index < count and node_kind(contents[index]) == block.kind:
+            index += 1
+            if (element := map_element(text, block, contents[start])) is not None:
+                elements[position] = element
+        else:
+            return None
+        counts.append(index - start)
+
+    if index != count:
+        return None
+    return KeptBlocks(
+        b"".join(digest(text, block.start, block.end) for block in blocks),
+        counts,
+        elements,
+    )
+
+
+def parse_blocks(
+    text: str,
+    blocks: list[Block],
+    context: list[tuple[str, str]],
+    parse: Callable[[str], BeautifulSoup],
+) -> list[tuple[list[PageElement], tuple[str, KeptBlocks] | None]] | None:
+    """Parse the changed blocks of one container inside its start tags.
+
+    The blocks are separated by comments, so the nodes of every block are
+    known. Returns the nodes and the kept content of every block, or None
+    when a block did not give its own nodes.
+    """
+    from bs4 import Comment, Tag
+
+    names = [name for _, name in context]
+    soup = parse(
+        "".join(start_tag for start_tag, _ in context)
+        + f"<!--{SEPARATOR}-->".join(
+            text[block.start : block.end] for block in blocks
+        )
+        + "".join(f"</{name}>" for name in reversed(names))
+    )
+
+    container: Tag | BeautifulSoup = soup
+    for name in names:
+        tags = [child for child in container.contents if isinstance(child, Tag)]
+        if len(tags) != 1 or tags[0].name != name:
+            return None
+        container = tags[0]
+
+    groups: list[list[PageElement]] = [[]]
+    for node in container.contents:
+        if isinstance(node, Comment) and node == SEPARATOR:
+            groups.append([])
+        else:
+            groups[-1].append(node)
+    if len(groups) != len(blocks):
+        return None
+
+    parsed: list[tuple[list[PageElement], tuple[str, KeptBlocks] | None]] = []
+    for block, nodes in zip(blocks, groups):
+        if not nodes_match(block, nodes):
+            return None
+        parsed.append(
+            (nodes, map_element(text, block, nodes[0]) if nodes else None)
+        )
+    return parsed
+
+
+def plan_blocks(
+    text: str,
+    container: Tag | BeautifulSoup,
+    old: KeptBlocks,
+    new: list[Block],
+    context: list[tuple[str, str]],
+    plan: SplicePlan,
+    parse: Callable[[str], BeautifulSoup],
+) -> KeptBlocks | None:
+    """Compare the blocks of one container and plan the splice of the changes.
+
+    The context holds the start tags and names of the container and its
+    ancestors. Returns the kept blocks of the new source, or None when the
+    changes can not be parsed on their own.
+    """
+    contents = container.contents
+    starts = list(accumulate(old.counts, initial=0))
+    new_digests = [digest(text, block.start, block.end) for block in new]
+    elements: dict[int, tuple[str, KeptBlocks]] = {}
+    # The old block kept in place of a new block, removed or the new block
+    # inserted, in the order of the new blocks
+    entries: list[tuple[bool | None, int, int]] = []
+
+    for tag, i1, i2, j1, j2 in SequenceMatcher(
+        None,
+        [
+            old.digests[start : start + DIGEST_SIZE]
+            for start in range(0, len(old.digests), DIGEST_SIZE)
+        ],
+        new_digests,
+    ).get_opcodes():
+        pairs = list(zip(range(i1, i2), range(j1, j2)))
+        if tag == "equal":
+            for i, j in pairs:
+                entries.append((None, i, j))
+                if (element := old.elements.get(i)) is not None:
+                    elements[j] = element
+            continue
+
+        if i2 - i1 == j2 - j1 and all(
+            (element := old.elements.get(i)) is not None
+            and new[j].children is not None
+            and element[0] == text[new[j].start : new[j].start_tag_end]
+            for i, j in pairs
+        ):
+            # The same elements with changed content
+            for i, j in pairs:
+                start_tag, children = old.elements[i]
+                node: Tag = contents[starts[i]]
+                kept = plan_blocks(
+                    text,
+                    node,
+                    children,
+                    new[j].children or [],
+                    [*context, (start_tag, node.name)],
+                    plan,
+                    parse,
+                )
+                if kept is None:
+                    return None
+                plan.ancestors.append(node)
+                entries.append((None, i, j))
+                elements[j] = (start_tag, kept)
+            continue
+
+        entries.extend((False, i, -1) for i in range(i1, i2))
+        entries.extend((True, -1, j) for j in range(j1, j2))
+
+    counts = array("I")
+    if all(action is None for action, _, _ in entries):
+        counts.extend(old.counts[i] for _, i, _ in entries)
+        return KeptBlocks(b"".join(new_digests), counts, elements)
+    if not context:
+        # Changes of the document itself are parsed in full
+        return None
+
+    inserted = [new[j] for action, _, j in entries if action]
+    parsed = parse_blocks(text, inserted, context, parse) if inserted else []
+    if parsed is None:
+        return None
+    parsed_blocks = iter(parsed)
+
+    actions: list[tuple[bool | None, list[PageElement]]] = []
+    for action, i, j in entries:
+        if action:
+            nodes, element = next(parsed_blocks)
+            counts.append(len(nodes))
+            if element is not None:
+                elements[j] = element
+        else:
+            nodes = contents[starts[i] : starts[i + 1]]
+            if action is None:
+                counts.append(old.counts[i])
+        actions.append((action, nodes))
+
+    plan.splices.append(Splice(container, actions))
+    return KeptBlocks(b"".join(new_digests), counts, elements)
+
+
+def apply_splice(splice: Splice) -> None:
+    """Replace the old nodes of the container with the parsed nodes."""
+    container = splice.container
+    position = 0
+    for action, nodes in splice.actions:
+        if action is None:
+            position += len(nodes)
+        elif action:
+            for node in nodes:
+                container.insert(position, node)
+                position += 1
+        else:
+            for node in nodes:
+                node.extract()
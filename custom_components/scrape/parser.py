@@ -0,0 +1,233 @@
+"""Parse workers for the scrape component.
+
+Parsing and extraction run in a pool dedicated to scrape instead of the
+general Home Assistant executor. The pool is either a thread pool, keeping
+the parsed documents for the sensors, or a process pool where only the
+extracted values are sent back to Home Assistant.
+
+A kept document of a single page is updated in place when the page changes,
+only the changed blocks are parsed again and only the values of the
+selectors the changes can affect are extracted again.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+import logging
+import multiprocessing
+from typing import TYPE_CHECKING, Any, TypeVar, cast
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import UpdateFailed
+import homeassistant.util.dt as dt_util
+
+from .const import PARSE_WORKERS
+from .extract import ScrapeMatcher
+from .incremental import (
+    Block,
+    DocumentBlocks,
+    SplicePlan,
+    apply_splice,
+    map_blocks,
+    plan_blocks,
+    scan_blocks,
+)
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+DATA_PARSE_EXECUTORS = "scrape_parse_executors"
+
+
+@dataclass
+class ScrapeResult:
+    """Parsed document, extracted sensor values and attributes of one item."""
+
+    soup: BeautifulSoup | None
+    values: dict[str, Any] = field(default_factory=dict)
+    attributes: dict[str, dict[str, Any]] = field(default_factory=dict)
+    blocks: DocumentBlocks | None = None
+
+
+def parse_document(text: str) -> BeautifulSoup:
+    """Parse one page.
+
+    bs4 and lxml are imported on the first parse in a parse worker instead of
+    when Home Assistant loads scrape.
+    """
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(text, "lxml")
+
+
+def merge_documents(soups: list[BeautifulSoup]) -> BeautifulSoup:
+    """Merge the parsed pages into the document of the first page."""
+    merged: BeautifulSoup = soups[0]
+    target = merged.body or merged
+
+    for soup in soups[1:]:
+        source = soup.body or soup
+        for child in list(source.contents):
+            target.append(child.extract())
+
+    return merged
+
+
+def merge_and_extract(
+    soups: list[BeautifulSoup], matcher: ScrapeMatcher
+) -> ScrapeResult:
+    """Merge the parsed pages of an item and extract the sensor values."""
+    soup = merge_documents(soups) if len(soups) > 1 else soups[0]
+    return ScrapeResult(soup, *matcher.extract(soup))
+
+
+def parse_and_extract(texts: list[str], matcher: ScrapeMatcher) -> ScrapeResult:
+    """Parse the pages of an item and return only the extracted values.
+
+    Runs in a worker process, the document is not sent back.
+    """
+    soups = [parse_document(text) for text in texts]
+    result = merge_and_extract(soups, matcher)
+    return ScrapeResult(None, result.values, result.attributes)
+
+
+def update_document(
+    text: str, layout: list[Block], matcher: ScrapeMatcher, previous: ScrapeResult
+) -> ScrapeResult | None:
+    """Update the document of the previous result to the changed page.
+
+    Returns None when the changes can not be parsed on their own, the
+    document is not modified then.
+    """
+    soup = cast("BeautifulSoup", previous.soup)
+    blocks = cast(DocumentBlocks, previous.blocks)
+    plan = SplicePlan()
+    if (
+        kept := plan_blocks(text, soup, blocks.blocks, layout, [], plan, parse_document)
+    ) is None:
+        return None
+
+    # Ancestors are matched before and after the change, a selector on an
+    # ancestor can stop or start matching
+    affected = matcher.affected_keys(
+        [node for splice in plan.splices for node in splice.removed], plan.ancestors
+    )
+    for splice in plan.splices:
+        apply_splice(splice)
+    affected |= matcher.affected_keys(
+        [node for splice in plan.splices for node in splice.inserted], plan.ancestors
+    )
+    # Values of new or changed selectors are extracted as well
+    affected.update(
+        key
+        for key, selector in matcher.selectors.items()
+        if key not in previous.values or blocks.selectors.get(key) != selector
+    )
+
+    values, attributes = matcher.extract(soup, affected)
+    for key in matcher.selectors.keys() - affected:
+        values[key] = previous.values[key]
+        if key in previous.attributes:
+            attributes[key] = previous.attributes[key]
+    return ScrapeResult(
+        soup, values, attributes, DocumentBlocks(kept, dict(matcher.selectors))
+    )
+
+
+def update_and_extract(
+    text: str, matcher: ScrapeMatcher, previous: ScrapeResult | None
+) -> ScrapeResult:
+    """Parse a changed page and extract the sensor values.
+
+    The document of the previous result is updated when its blocks are kept,
+    otherwise the page is parsed in full. The previous result must not be
+    used afterwards.
+    """
+    layout = scan_blocks(text)
+    if (
+        layout is not None
+        and previous is not None
+        and previous.soup is not None
+        and previous.blocks is not None
+    ):
+        try:
+            if (result := update_document(text, layout, matcher, previous)) is not None:
+                return result
+        except Exception:
+            # The document may be modified, the page is parsed in full
+            _LOGGER.debug("Could not update the document", exc_info=True)
+        finally:
+            previous.blocks = None
+        _LOGGER.debug("Parsing the changed page in full")
+
+    soup = parse_document(text)
+    kept = map_blocks(text, soup, layout) if layout is not None else None
+    return ScrapeResult(
+        soup,
+        *matcher.extract(soup),
+        None if kept is None else DocumentBlocks(kept, dict(matcher.selectors)),
+    )
+
+
+@callback
+def async_get_parse_executor(hass: HomeAssistant, in_process: bool) -> Executor:
+    """Return the shared parse pool, creating it on first use."""
+    executors: dict[bool, Executor] = hass.data.setdefault(DATA_PARSE_EXECUTORS, {})
+
+    if (executor := executors.get(in_process)) is not None:
+        return executor
+
+    if in_process:
+        # Forking the running Home Assistant process is not safe. The spawned
+        # workers use the time zone of Home Assistant for parsed dates.
+        executor = ProcessPoolExecutor(
+            PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=dt_util.set_default_time_zone,
+            initargs=(dt_util.DEFAULT_TIME_ZONE,),
+        )
+    else:
+        executor = ThreadPoolExecutor(PARSE_WORKERS, thread_name_prefix="scrape_parse")
+    executors[in_process] = executor
+
+    @callback
+    def _async_shutdown(event: Event) -> None:
+        """Shut down the parse pool."""
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_shutdown)
+    _LOGGER.debug(
+        "Created %s parse pool with %s workers",
+        "process" if in_process else "thread",
+        PARSE_WORKERS,
+    )
+    return executor
+
+
+async def async_add_parse_job(
+    hass: HomeAssistant,
+    in_process: bool,
+    target: Callable[..., _T],
+    *args: Any,
+) -> _T:
+    """Run a parse job in the parse pool.
+
+    A process pool is broken when a worker dies, e.g. out of memory. It is
+    dropped, so the next job starts a new pool.
+    """
+    executor = async_get_parse_executor(hass, in_process)
+    try:
+        return await hass.loop.run_in_executor(executor, target, *args)
+    except BrokenProcessPool as err:
+        executors: dict[bool, Executor] = hass.data[DATA_PARSE_EXECUTORS]
+        if executors.get(in_process) is executor:
+            del executors[in_process]
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise UpdateFailed(f"The parse process pool is broken: {err}") from err
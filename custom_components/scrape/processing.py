@@ -0,0 +1,153 @@
+"""Post-processing of extracted values for the scrape component."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+import re
+from typing import Any
+
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    CONF_DATE_FORMAT,
+    CONF_NUMBER_FORMAT,
+    CONF_REGEX,
+    CONF_SCALE,
+    CONF_STRIP,
+    NUMBER_FORMAT_DECIMAL_COMMA,
+    NUMBER_FORMAT_DECIMAL_POINT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# The first number in the text, separators must be followed by a digit
+NUMBER_RE = re.compile(r"[-+]?\d+(?:[.,' \u00a0]\d+)*")
+THOUSANDS_SEPARATORS = "' \u00a0"
+# Separators of every number format, decimal separator first
+SEPARATORS: dict[str, tuple[str, str]] = {
+    NUMBER_FORMAT_DECIMAL_POINT: (".", ","),
+    NUMBER_FORMAT_DECIMAL_COMMA: (",", "."),
+}
+# A number is only valid if every thousands separator groups three digits
+VALID_NUMBER_RE: dict[str, re.Pattern[str]] = {
+    number_format: re.compile(
+        rf"[-+]?(?:\d{{1,3}}(?:[{re.escape(thousands + THOUSANDS_SEPARATORS)}]\d{{3}})+"
+        rf"|\d+)(?:{re.escape(decimal)}\d+)?"
+    )
+    for number_format, (decimal, thousands) in SEPARATORS.items()
+}
+# Directives of a date format that parse a time of day
+TIME_DIRECTIVE_RE = re.compile(r"%(?:%|([HIMSfpcXzZ]))")
+
+
+def parse_number(text: str, number_format: str) -> int | float | None:
+    """Parse the first number in the text.
+
+    Thousands separators are removed, the decimal separator depends on the
+    number format. A number that does not fit the format gives None instead of
+    a wrong value, e.g. 0.5 with a decimal comma.
+    """
+    if (match := NUMBER_RE.search(text)) is None:
+        return None
+
+    number = match.group(0)
+    if not VALID_NUMBER_RE[number_format].fullmatch(number):
+        _LOGGER.debug("Number '%s' does not match the %s format", number, number_format)
+        return None
+
+    decimal, thousands = SEPARATORS[number_format]
+    for separator in thousands + THOUSANDS_SEPARATORS:
+        number = number.replace(separator, "")
+    number = number.replace(decimal, ".")
+
+    return float(number) if "." in number else int(number)
+
+
+def has_time_directive(date_format: str) -> bool:
+    """Return True if the date format parses a time of day."""
+    return any(match.group(1) for match in TIME_DIRECTIVE_RE.finditer(date_format))
+
+
+def format_date(value: datetime, date_format: str) -> str:
+    """Return the parsed date as ISO string for the date and timestamp sensors.
+
+    Formats without a time of day give a date, naive times are in the time
+    zone of Home Assistant.
+    """
+    if not has_time_directive(date_format):
+        return value.date().isoformat()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return value.isoformat()
+
+
+@dataclass(frozen=True)
+class ScrapeProcessor:
+    """Declarative processing of an extracted value.
+
+    The steps run in a fixed order in the parse worker: strip, regex, number,
+    scale and date. The value becomes None when a step can not be applied.
+    """
+
+    strip: bool = False
+    regex: str | None = None
+    number_format: str | None = None
+    scale: float | None = None
+    date_format: str | None = None
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> ScrapeProcessor:
+        """Create the processor from a sensor config."""
+        scale: float | None = config.get(CONF_SCALE)
+        return cls(
+            bool(config.get(CONF_STRIP, False)),
+            config.get(CONF_REGEX) or None,
+            config.get(CONF_NUMBER_FORMAT) or None,
+            float(scale) if scale is not None else None,
+            config.get(CONF_DATE_FORMAT) or None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if any step is selected."""
+        return self != ScrapeProcessor()
+
+    def process(self, value: Any) -> Any:
+        """Run the selected steps on the value."""
+        if value is None or not self.enabled:
+            return value
+
+        if self.strip and isinstance(value, str):
+            value = value.strip()
+
+        if self.regex is not None:
+            try:
+                match = re.search(self.regex, str(value))
+            except re.error:
+                _LOGGER.error("Invalid regex '%s'", self.regex)
+                return None
+            if match is None:
+                return None
+            value = match.group(1) if match.re.groups else match.group(0)
+
+        if self.number_format is not None:
+            if (value := parse_number(str(value), self.number_format)) is None:
+                return None
+
+        if self.scale is not None:
+            try:
+                value = float(value) * self.scale
+            except (TypeError, ValueError):
+                return None
+
+        if self.date_format is not None:
+            try:
+                value = datetime.strptime(str(value).strip(), self.date_format)
+            except ValueError:
+                return None
+            value = format_date(value, self.date_format)
+
+        _LOGGER.debug("Processed value: %s", value)
+        return value
@@ -4,41 +4,27 @@ from __future__ import annotations
 import asyncio
 from datetime import datetime, timedelta
 import logging
-import re
 from typing import Any, cast
 
-import voluptuous as vol
-
 from homeassistant.components.sensor import SensorDeviceClass
 from homeassistant.components.sensor.helpers import async_parse_date_datetime
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
-    CONF_ATTRIBUTE,
     CONF_NAME,
     CONF_UNIQUE_ID,
     CONF_VALUE_TEMPLATE,
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import PlatformNotReady
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.template import Template
-from homeassistant.helpers.template_entity import (
-    TEMPLATE_SENSOR_BASE_SCHEMA,
-    TemplateSensor,
-)
+from homeassistant.helpers.template_entity import TemplateSensor
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import (
-    CONF_BS_SEARCH_FIND,
-    CONF_BS_SEARCH_FIND_STRING,
-    CONF_BS_SEARCH_SELECT,
-    CONF_BS_SEARCH_TYPE,
-    CONF_CLEAR_UPDATED_BIN_SENSOR_AFTER,
-    CONF_INDEX,
-    CONF_SELECT,
-    DOMAIN,
-)
+from . import item_sensor_config, item_unique_id, selector_key
+from .const import CONF_CLEAR_UPDATED_BIN_SENSOR_AFTER, DOMAIN, SIGNAL_ADD_SENSORS
 from .coordinator import ScrapeCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -60,26 +46,28 @@ async def async_setup_platform(
         raise PlatformNotReady
 
     entities: list[ScrapeSensor] = []
-    for sensor_config in sensors_config:
+    for index, sensor_config in enumerate(sensors_config):
         value_template: Template | None = sensor_config.get(CONF_VALUE_TEMPLATE)
         if value_template is not None:
             value_template.hass = hass
 
-        entities.append(
-            ScrapeSensor(
-                hass,
-                coordinator,
-                sensor_config,
-                sensor_config[CONF_NAME],
-                sensor_config.get(CONF_UNIQUE_ID),
-                sensor_config.get(CONF_BS_SEARCH_TYPE, CONF_BS_SEARCH_SELECT),
-                sensor_config[CONF_SELECT],
-                sensor_config.get(CONF_ATTRIBUTE),
-                sensor_config[CONF_INDEX],
-                value_template,
-                sensor_config.get(CONF_CLEAR_UPDATED_BIN_SENSOR_AFTER, 24),
+        unique_id: str | None = sensor_config.get(CONF_UNIQUE_ID)
+        for item in coordinator.items:
+            item_config: ConfigType = item_sensor_config(hass, sensor_config, item)
+
+            entities.append(
+                ScrapeSensor(
+                    hass,
+                    coordinator,
+                    item_config,
+                    item_config[CONF_NAME],
+                    item_unique_id(unique_id, item) if unique_id else None,
+                    item,
+                    selector_key(index, sensor_config),
+                    value_template,
+                    sensor_config.get(CONF_CLEAR_UPDATED_BIN_SENSOR_AFTER, 24),
+                )
             )
-        )
 
     async_add_entities(entities)
 
@@ -88,47 +76,40 @@ async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up the Scrape sensor entry."""
-    entities: list = []
-
     coordinator: ScrapeCoordinator = hass.data[DOMAIN][entry.entry_id]
-    config = dict(entry.options)
-
-    for sensor in config["sensor"]:
-        sensor_config: ConfigType = vol.Schema(
-            TEMPLATE_SENSOR_BASE_SCHEMA.schema, extra=vol.ALLOW_EXTRA
-        )(sensor)
-
-        name: str = sensor_config[CONF_NAME]
-        select: str = sensor_config[CONF_SELECT]
-        attr: str | None = sensor_config.get(CONF_ATTRIBUTE)
-        index: int = int(sensor_config[CONF_INDEX])
-        value_string: str | None = sensor_config.get(CONF_VALUE_TEMPLATE)
-        unique_id: str = sensor_config[CONF_UNIQUE_ID]
-        search_type: str = sensor_config[CONF_BS_SEARCH_TYPE]
-        clear_udated_bin_sensor_after: float = float(
-            sensor_config.get(CONF_CLEAR_UPDATED_BIN_SENSOR_AFTER, 24)
-        )
 
-        value_template: Template | None = (
-            Template(value_string, hass) if value_string is not None else None
-        )
-        entities.append(
-            ScrapeSensor(
-                hass,
-                coordinator,
-                sensor_config,
-                name,
-                unique_id,
-                search_type,
-                select,
-                attr,
-                index,
-                value_template,
-                clear_udated_bin_sensor_after,
-            )
-        )
+    @callback
+    def async_add_sensors(sensor_configs: list[ConfigType]) -> None:
+        """Add the entities of the sensors for all items."""
+        entities: list[ScrapeSensor] = []
+        for sensor_config in sensor_configs:
+            unique_id: str = sensor_config[CONF_UNIQUE_ID]
+            for item in coordinator.items:
+                item_config: ConfigType = item_sensor_config(hass, sensor_config, item)
+
+                entities.append(
+                    ScrapeSensor(
+                        hass,
+                        coordinator,
+                        item_config,
+                        item_config[CONF_NAME],
+                        item_unique_id(unique_id, item),
+                        item,
+                        unique_id,
+                        # The value template is shared by the entities of all items
+                        sensor_config.get(CONF_VALUE_TEMPLATE),
+                        float(sensor_config[CONF_CLEAR_UPDATED_BIN_SENSOR_AFTER]),
+                    )
+                )
 
-    async_add_entities(entities)
+        async_add_entities(entities)
+
+    async_add_sensors(list(coordinator.sensor_configs.values()))
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_ADD_SENSORS.format(entry.entry_id), async_add_sensors
+        )
+    )
 
 
 class ScrapeSensor(CoordinatorEntity[ScrapeCoordinator], TemplateSensor):
@@ -142,11 +123,9 @@ class ScrapeSensor(CoordinatorEntity[ScrapeCoordinator], TemplateSensor):
         name: str,
         unique_id: str | None,
         # KGN start
-        search_type: str,
+        item: str,
+        key: str,
         # KGN end
-        select: str,
-        attr: str | None,
-        index: int,
         value_template: Template | None,
         # KGN start
         clear_updated_bin_sensor_after: float,
@@ -162,75 +141,32 @@ class ScrapeSensor(CoordinatorEntity[ScrapeCoordinator], TemplateSensor):
             unique_id=unique_id,
         )
         self._name: Template = name  # type: ignore
-        self._select = select
-        self._attr = attr
-        self._index = index
         self._value_template = value_template
         #      self.hass = hass
         # KGN start
-        self._search_type = search_type
+        self._item = item
+        self._key = key
         self._clear_updated_bin_sensor_after: float = clear_updated_bin_sensor_after
         self.sensor_name: str = self._name.template  # type: ignore
         self.forced_refresh: bool = False
         # KGN end
 
     def _extract_value(self) -> Any:
-        """Parse the html extraction in the executor."""
-        raw_data = self.coordinator.data
-        value = ""
-
-        # KGN start
-        if self._search_type == CONF_BS_SEARCH_SELECT:
-            # KGN end
-            try:
-                if self._attr is not None:
-                    value = raw_data.select(self._select)[self._index][self._attr]
-                else:
-                    tag = raw_data.select(self._select)[self._index]
-                    if tag.name in ("style", "script", "template"):
-                        value = tag.string
-                    else:
-                        value = tag.text
-            except IndexError:
-                _LOGGER.warning(
-                    "Index '%s' not found in %s", self._index, self.entity_id
-                )
-                value = None
-            except KeyError:
-                _LOGGER.warning(
-                    "Attribute '%s' not found in %s", self._attr, self.entity_id
-                )
-                value = None
-
-        # KGN start
-        elif self._search_type == CONF_BS_SEARCH_FIND:
-            try:
-                value = raw_data.find_all(self._select)[self._index].string
-
-            except AttributeError:
-                value = None
-
-            except Exception:
-                _LOGGER.exception("BS find exception")
-                value = None
-
-        elif self._search_type == CONF_BS_SEARCH_FIND_STRING:
-            try:
-                value = raw_data.find_all(string=re.compile(self._select))[
-                    self._index
-                ].string
-
-            except AttributeError:
-                value = None
-
-            except Exception:
-                _LOGGER.exception("BS find exception")
-                value = None
-        # KGN end
+        """Return the value extracted by the coordinator."""
+        if (result := self.coordinator.data.get(self._item)) is None:
+            return None
 
+        value = result.values.get(self._key)
         _LOGGER.debug("Parsed value: %s", value)
         return value
 
+    def _extract_attributes(self) -> dict[str, Any]:
+        """Return the state attributes extracted by the coordinator."""
+        if (result := self.coordinator.data.get(self._item)) is None:
+            return {}
+
+        return result.attributes.get(self._key, {})
+
     async def async_added_to_hass(self) -> None:
         """Ensure the data from the initial update is reflected in the state."""
         await super().async_added_to_hass()
@@ -239,6 +175,9 @@ class ScrapeSensor(CoordinatorEntity[ScrapeCoordinator], TemplateSensor):
     def _async_update_from_rest_data(self) -> None:
         """Update state from the rest data."""
         value = self._extract_value()
+        # KGN start
+        self._attr_extra_state_attributes = self._extract_attributes()
+        # KGN end
 
         if (template := self._value_template) is not None:
             value = template.async_render_with_possible_json_value(value, None)
@@ -316,6 +255,11 @@ class ScrapeSensor(CoordinatorEntity[ScrapeCoordinator], TemplateSensor):
         #     self.coordinator.updated[self.sensor_name] = True
         # KGN end
 
+    @property
+    def available(self) -> bool:
+        """Return if the document of the item was fetched."""
+        return super().available and self._item in self.coordinator.data
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""